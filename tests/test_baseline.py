@@ -0,0 +1,95 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uilint  # noqa: E402
+
+XAML = r'''<Activity x:Class="Main" xmlns="http://schemas.microsoft.com/netfx/2009/xaml/activities"
+  xmlns:ui="http://schemas.uipath.com/workflow/activities"
+  xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml">
+  <Sequence DisplayName="Sequence">
+    %s
+    <Assign />
+  </Sequence>
+</Activity>
+'''
+
+
+# Write Main.xaml with the activities
+def write_xaml(projectdir: str, *activities: str) -> None:
+  with open(os.path.join(projectdir, 'Main.xaml'), 'w', encoding='utf-8') as f:
+    f.write(XAML % '\n'.join(activities))
+
+
+# Lint the project and get rules of results (all findings are added to the baseline if update)
+def lint(projectdir: str, baseline: uilint.Baseline, update: bool = False) -> list:
+  prj = uilint.Project(
+    projectdir, baseline=None if update else baseline,
+    ruleset=uilint.select_rules(disable=uilint.INVOKE_RULES)
+  )
+  prj.lint()
+
+  if update:
+    baseline.add(prj.findings())
+    baseline.save()
+    return []
+
+  return list(map(lambda r: r.rule, prj.results()))
+
+
+# Make a baseline of the project and load it again
+def update_baseline(projectdir: str, path: str) -> uilint.Baseline:
+  lint(projectdir, uilint.Baseline(path), True)
+  return uilint.Baseline.load(path)
+
+
+def test_update_and_filter(tmp_path):
+  projectdir = str(tmp_path)
+  write_xaml(projectdir, '<ui:MessageBox Text="a" />', '<ui:GetPassword DisplayName="Get" />')
+
+  uilint.load_translation('en')
+  baseline = update_baseline(projectdir, str(tmp_path / 'baseline.json'))
+
+  assert sum(baseline.fingerprints.values()) == 3  # Including no-project-file
+  assert lint(projectdir, baseline) == []
+
+  # Findings are identified by their activities, not by line numbers
+  write_xaml(
+    projectdir, '<TerminateWorkflow DisplayName="Stop" />', '<ui:MessageBox Text="a" />',
+    '<ui:GetPassword DisplayName="Get" />', '<ui:GetPassword DisplayName="Get 2" />'
+  )
+  assert lint(projectdir, baseline) == ['no-getpassword', 'terminateworkflow']
+
+
+def test_duplicates(tmp_path):
+  projectdir = str(tmp_path)
+  with open(os.path.join(projectdir, 'project.json'), 'w') as f:
+    f.write('{}')
+
+  write_xaml(projectdir, '<ui:MessageBox Text="a" />', '<ui:MessageBox Text="a" />')
+
+  uilint.load_translation('en')
+  baseline = update_baseline(projectdir, str(tmp_path / 'baseline.json'))
+
+  assert list(baseline.fingerprints.values()) == [2]
+  assert lint(projectdir, baseline) == []
+
+  # A new duplicate is reported (once for each run)
+  write_xaml(projectdir, *(['<ui:MessageBox Text="a" />'] * 3))
+  assert lint(projectdir, baseline) == ['messagebox']
+  assert lint(projectdir, baseline) == ['messagebox']
+
+
+def test_language(tmp_path):
+  projectdir = str(tmp_path)
+  write_xaml(projectdir, '<ui:MessageBox Text="a" />')
+
+  try:
+    uilint.load_translation('en')
+    baseline = update_baseline(projectdir, str(tmp_path / 'baseline.json'))
+
+    uilint.load_translation('ja')
+    assert lint(projectdir, baseline) == []
+  finally:
+    uilint.load_translation('en')
@@ -0,0 +1,144 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uilint  # noqa: E402
+
+XAML = r'''<Activity x:Class="Main" xmlns="http://schemas.microsoft.com/netfx/2009/xaml/activities"
+  xmlns:ui="http://schemas.uipath.com/workflow/activities"
+  xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml">
+  <Sequence DisplayName="Sequence">
+    %s
+    <Assign />
+  </Sequence>
+</Activity>
+'''
+
+INVOKE = '<ui:InvokeWorkflowFile DisplayName="Invoke" WorkflowFileName="%s" />'
+
+
+# Make a project of XAML files ({path: list of invoked WorkflowFileName}) with Main.xaml as main
+def make_project(projectdir: str, workflows: dict) -> str:
+  os.makedirs(projectdir)
+
+  with open(os.path.join(projectdir, 'project.json'), 'w') as f:
+    json.dump({'main': 'Main.xaml'}, f)
+
+  for path, invoked in workflows.items():
+    xamlpath = os.path.join(projectdir, *path.split('/'))
+    os.makedirs(os.path.dirname(xamlpath), exist_ok=True)
+
+    with open(xamlpath, 'w', encoding='utf-8') as f:
+      f.write(XAML % '\n'.join(map(lambda w: INVOKE % w, invoked)))
+
+  return projectdir
+
+
+# Get results of the project as a sorted list of (path relative to the project, rule)
+# paths: XAML files to be linted (others are only scanned, None means all)
+def graph_results(projectdir: str, paths: list = None) -> list:
+  uilint.load_translation('en')
+  paths = [projectdir] if paths is None else [os.path.join(projectdir, p) for p in paths]
+
+  return sorted(map(
+    lambda r: (os.path.relpath(r.file, projectdir).replace(os.sep, '/'), r.rule),
+    filter(lambda r: r.rule in uilint.INVOKE_RULES, uilint.lint_paths(paths))
+  ))
+
+
+def test_graph_rules(tmp_path):
+  projectdir = make_project(str(tmp_path / 'project'), {
+    'Main.xaml': ['Sub\\Process.xaml', 'Missing.xaml', '[path]'],
+    'Sub/Process.xaml': ['Sub\\Loop.xaml'],
+    'Sub/Loop.xaml': ['sub/process.xaml'],
+    'Unused.xaml': [],
+  })
+
+  assert graph_results(projectdir) == [
+    ('Main.xaml', 'missing-workflow'),
+    ('Sub/Loop.xaml', 'recursive-workflow'),
+    ('Unused.xaml', 'unreachable-workflow'),
+  ]
+
+
+def test_graph_file_names(tmp_path):
+  # Names of files are not WorkflowFileName values ("[" does not start a VB expression)
+  projectdir = make_project(str(tmp_path / 'project'), {
+    'Main.xaml': ['Drafts\\[Draft] Sub.xaml'],
+    '[Draft] Main.xaml': [],
+    'Drafts/[Draft] Sub.xaml': ['Drafts\\[Draft] Sub.xaml'],
+  })
+
+  assert graph_results(projectdir) == [
+    ('Drafts/[Draft] Sub.xaml', 'recursive-workflow'),
+    ('[Draft] Main.xaml', 'unreachable-workflow'),
+  ]
+
+
+# Lint the project in shards (not sharded if count is None) and merge their partial results
+def merge_shards(projectdir: str, count: int) -> list:
+  partials = []
+
+  for index in range(count or 1):
+    prj = uilint.Project(projectdir)
+    if count is not None:
+      prj.shard(index, count)
+
+    prj.lint()
+    partials.append(json.loads(json.dumps({'projects': [prj.partial()]})))
+
+  return list(map(tuple, uilint.merge_partials(partials)[0][1]))
+
+
+def test_shard_merge(tmp_path):
+  projectdir = make_project(str(tmp_path / 'project'), {
+    'Main.xaml': ['A.xaml', 'Sub\\B.xaml', 'Missing.xaml'],
+    'A.xaml': ['Sub\\C.xaml'],
+    'Sub/B.xaml': ['Sub\\C.xaml', 'Gone.xaml'],
+    'Sub/C.xaml': ['A.xaml'],
+    'Unused1.xaml': ['Unused2.xaml'],
+    'Unused2.xaml': [],
+  })
+
+  uilint.load_translation('en')
+  prj = uilint.Project(projectdir)
+  prj.lint()
+  expected = list(map(tuple, prj.results()))
+
+  assert len(list(filter(lambda r: r[3] in uilint.INVOKE_RULES, expected))) == 5
+
+  for count in (None, 1, 2, 3):
+    assert merge_shards(projectdir, count) == expected, count
+
+
+def test_scanned_commentout(tmp_path):
+  # Invocations in ui:CommentOut and comments are ignored whether a file is linted or scanned
+  projectdir = make_project(str(tmp_path / 'project'), {
+    'Main.xaml': ['A.xaml'],
+    'B.xaml': [],
+    'C.xaml': [],
+    'D.xaml': [],
+  })
+
+  with open(os.path.join(projectdir, 'A.xaml'), 'w', encoding='utf-8') as f:
+    f.write(XAML % '\n'.join([
+      '<ui:CommentOut DisplayName="Comment Out"><ui:CommentOut.Body><Sequence>',
+      '<ui:CommentOut DisplayName="Nested" />',
+      INVOKE % 'B.xaml',
+      '</Sequence></ui:CommentOut.Body></ui:CommentOut>',
+      '<!-- %s -->' % (INVOKE % 'C.xaml'),
+      INVOKE % 'D.xaml',
+    ]))
+
+  expected = [('B.xaml', 'unreachable-workflow'), ('C.xaml', 'unreachable-workflow')]
+  assert graph_results(projectdir) == expected
+
+  # A.xaml is only scanned
+  assert graph_results(projectdir, ['Main.xaml', 'B.xaml', 'C.xaml', 'D.xaml']) == expected
+
+  with open(os.path.join(projectdir, '.uilintignore'), 'w') as f:
+    f.write('A.xaml\n')
+
+  assert graph_results(projectdir) == expected
@@ -0,0 +1,109 @@
+import os
+import shutil
+import stat
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uilint  # noqa: E402
+
+# Fake tf command which logs its arguments (a line per run, tab separated) to FAKE_TF_LOG
+# It fails if one of its arguments contains FAKE_TF_FAIL.
+FAKE_TF = r'''#!%s
+import os
+import sys
+
+with open(os.environ['FAKE_TF_LOG'], 'a') as f:
+  f.write('\t'.join(sys.argv[1:]) + '\n')
+
+fail = os.environ.get('FAKE_TF_FAIL')
+sys.exit(1 if fail and any(map(lambda arg: fail in arg, sys.argv[1:])) else 0)
+'''
+
+XAML = r'''<Activity x:Class="Main" xmlns="http://schemas.microsoft.com/netfx/2009/xaml/activities"
+  xmlns:ui="http://schemas.uipath.com/workflow/activities"
+  xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml">
+  <ui:Click DisplayName="Click" InformativeScreenshot="inuse" />
+</Activity>
+'''
+
+
+# Project with a screenshot in use and unused screenshots (ss000.png, ss001.png, ...)
+def make_project(projectdir: str, unused: int) -> uilint.Project:
+  ssdir = os.path.join(projectdir, '.screenshots')
+  os.makedirs(ssdir)
+
+  with open(os.path.join(projectdir, 'project.json'), 'w') as f:
+    f.write('{}')
+  with open(os.path.join(projectdir, 'Main.xaml'), 'w') as f:
+    f.write(XAML)
+
+  for name in ['inuse'] + list(map(lambda i: 'ss%03d' % i, range(unused))):
+    with open(os.path.join(ssdir, '%s.png' % name), 'wb') as f:
+      f.write(name.encode())
+
+  uilint.load_translation('en')
+  prj = uilint.Project(projectdir)
+  prj.lint()
+
+  return prj
+
+
+@pytest.fixture
+def fake_tf(tmp_path, monkeypatch):
+  tf = tmp_path / 'tf'
+  tf.write_text(FAKE_TF % sys.executable)
+  tf.chmod(tf.stat().st_mode | stat.S_IXUSR)
+
+  log = tmp_path / 'tf.log'
+  monkeypatch.setenv('UILINT_TF', str(tf))
+  monkeypatch.setenv('FAKE_TF_LOG', str(log))
+
+  # Runs of the fake tf command as lists of arguments
+  return lambda: list(map(lambda line: line.split('\t'), log.read_text().splitlines()))
+
+
+def test_vsts_batches(tmp_path, fake_tf):
+  prj = make_project(str(tmp_path / 'project'), 250)
+
+  assert uilint.remove_screenshots(prj, 'vsts') == 0
+
+  runs = fake_tf()
+  assert list(map(lambda run: run[0], runs)) == ['delete', 'delete', 'delete', 'checkin']
+  assert list(map(lambda run: len(run) - 2, runs[:3])) == [100, 100, 50]
+
+  deleted = sum(map(lambda run: run[2:], runs[:3]), [])
+  assert deleted == list(map(lambda i: prj.screenshot_path('ss%03d' % i), range(250)))
+
+
+def test_vsts_errors(tmp_path, fake_tf, monkeypatch, capsys):
+  prj = make_project(str(tmp_path / 'project'), 250)
+
+  # A failed batch counts all of its files, and a failed checkin counts one
+  monkeypatch.setenv('FAKE_TF_FAIL', 'ss150')
+  assert uilint.remove_screenshots(prj, 'vsts') == 100
+
+  monkeypatch.setenv('FAKE_TF_FAIL', 'checkin')
+  assert uilint.remove_screenshots(prj, 'vsts') == 1
+  assert 'Error: 1' in capsys.readouterr().out.splitlines()[-1]
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_git_untracked(tmp_path):
+  projectdir = str(tmp_path / 'project')
+  prj = make_project(projectdir, 3)
+
+  def git(*args):
+    config = ['-c', 'user.name=uilint', '-c', 'user.email=uilint@localhost']
+    subprocess.run(['git', '-C', projectdir] + config + list(args), check=True)
+
+  git('init', '-q')
+  git('add', '--', prj.screenshot_path('ss000'), prj.screenshot_path('ss002'))
+  git('commit', '-q', '-m', 'Screenshots')
+
+  # ss001.png is not tracked by git
+  assert uilint.remove_screenshots(prj, 'git') == 0
+  assert os.listdir(prj.ssdir) == ['inuse.png']
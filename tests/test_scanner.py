@@ -0,0 +1,73 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uilint  # noqa: E402
+
+XAML = r'''<Activity x:Class="Main" xmlns="http://schemas.microsoft.com/netfx/2009/xaml/activities"
+  xmlns:ui="http://schemas.uipath.com/workflow/activities"
+  xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml">
+  <Sequence DisplayName="Sequence">
+    <ui:TypeInto DisplayName="Type Password" Text="password123" />
+    <ui:TypeInto DisplayName="Type Kana" Text="ｱｲｳ" />
+    <If DisplayName="If Equal" Condition="[x = 1]" />
+    <If DisplayName="If And" Condition="[x And &quot;a or b&quot;]" />
+  </Sequence>
+</Activity>
+'''
+
+
+def test_selector_case():
+  scan = uilint.attribute_scanner.scan
+
+  assert scan('Selector', "<wnd app='x.exe' Title='Book1.xlsx' />") == frozenset()
+  assert scan('Selector', "<wnd app='x.exe' title='Book1.XLSX' />") == {'selector-extensions'}
+  assert scan('Selector', "<ctrl cls='WindowsForms10.EDIT' />") == {'selector-windowsforms'}
+  assert scan('Selector', "<wnd omit:title='a.txt' xmlns:omit='omit' />") == frozenset()
+
+
+def test_condition_case():
+  scan = uilint.attribute_scanner.scan
+
+  assert scan('Condition', '[a AND b]') == {'no-and-or'}
+  assert scan('Condition', '[a AndAlso b]') == frozenset()
+  assert scan('Condition', '[a = " and "]') == frozenset()
+
+
+def test_normalize_per_pattern():
+  scanner = uilint.AttributeScanner()
+  scanner.add('Value', 'raw', r'"x"', ('x',))
+  scanner.add('Value', 'stripped', r'^y$', ('y',), False, lambda v: v.replace('"x"', ''))
+  scanner.add('Value', 'upper', r'^Y$', (), True, lambda v: v.replace('"x"', ''))
+
+  assert scanner.scan('Value', '"x"y') == {'raw', 'stripped', 'upper'}
+  assert scanner.scan('Value', 'y"x"z') == {'raw'}
+  assert scanner.scan('Value', 'z') == frozenset()
+
+
+def test_plugin_patterns(tmp_path, monkeypatch):
+  # Patterns of plugins do not fire rules of other patterns of the same attribute
+  scanner = uilint.AttributeScanner()
+  for attribute, patterns in uilint.attribute_scanner.patterns.items():
+    for name, literals, pattern, normalize in patterns:
+      scanner.add(
+        attribute, name, pattern.pattern, literals, bool(pattern.flags & re.IGNORECASE), normalize
+      )
+
+  scanner.add('Text', 'plugin-password', r'password')
+  scanner.add('Condition', 'plugin-equal', r' = ')
+  monkeypatch.setattr(uilint, 'attribute_scanner', scanner)
+
+  projectdir = tmp_path / 'project'
+  projectdir.mkdir()
+  (projectdir / 'project.json').write_text('{}')
+  (projectdir / 'Main.xaml').write_text(XAML, encoding='utf-8')
+
+  rules = sorted(map(
+    lambda r: r.rule, uilint.lint_paths([str(projectdir)], disable=uilint.INVOKE_RULES)
+  ))
+
+  # Only "Type Kana" and "If And" are reported
+  assert rules == ['kana-typeinto', 'no-and-or']
@@ -0,0 +1,221 @@
+import os
+import re
+import sys
+
+import pytest
+from lxml import etree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uilint  # noqa: E402
+import uixaml  # noqa: E402
+
+from uilint import MessageCategory, _  # noqa: E402
+
+# Project of edge cases for rules (nested CommentOut/If/ExcelApplicationScope, comment-split
+# x:Reference, empty Catch, Sequence with only Variables, nested screenshots, etc.)
+PROJECTDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'walk')
+
+GRAPH_RULES = ('missing-workflow', 'unreachable-workflow', 'recursive-workflow')
+
+
+# Lint the XAML file by XPath queries for each rule (as uilint did before the tree walk)
+# Results are (category, message) in the order of rules, and in document order for each rule.
+def xpath_lint(xamlpath: str, stored: set) -> list:
+  results = []
+  xpath = etree.XPathEvaluator(etree.parse(xamlpath), namespaces=uixaml.xamlns)
+
+  def found(category, rule, form, *params):
+    results.append((category, form % ((_('rule:%s' % rule),) + params)))
+
+  for e in xpath('//ui:*[@InformativeScreenshot]'):
+    if e.get('InformativeScreenshot') not in stored:
+      found(
+        MessageCategory.ERROR, 'no-screenshots', '%s (Activity: %s, Screenshot: %s)',
+        uixaml.displayname(e), e.get('InformativeScreenshot')
+      )
+
+  for e in xpath('//ui:GetPassword'):
+    found(MessageCategory.ERROR, 'no-getpassword', '%s (GetPassword: %s)', uixaml.displayname(e))
+
+  for e in xpath('//ui:MessageBox[not(ancestor::ui:CommentOut)]'):
+    found(
+      MessageCategory.ERROR, 'messagebox', '%s (MessageBox: %s, Message: %s)',
+      uixaml.displayname(e), e.get('Text')
+    )
+
+  for e in xpath('//xaml:TerminateWorkflow[not(ancestor::ui:CommentOut)]'):
+    found(
+      MessageCategory.ERROR, 'terminateworkflow',
+      '%s (TerminateWorkflow: %s, Exception: %s, Reason: %s)',
+      uixaml.displayname(e), e.get('Exception'), e.get('Reason')
+    )
+
+  for e in xpath('//xaml:FlowStep[@x:Name = ./xaml:FlowStep.Next/x:Reference/text()]'):
+    activity = e.xpath('./*[not(xaml:FlowStep.Next) and not(sap2010:*)]', namespaces=uixaml.xamlns)
+    found(
+      MessageCategory.ERROR, 'looped-activity', '%s (Activity: %s)', uixaml.displayname(activity[0])
+    )
+
+  for e in xpath('//xaml:Sequence[not(*) or (count(*) = 1 and ./xaml:Sequence.Variables)]'):
+    found(MessageCategory.ERROR, 'empty-sequence', '%s (Sequence: %s)', uixaml.displayname(e))
+
+  for e in xpath(r'''
+//xaml:Sequence[
+  not(ancestor::ui:CommentOut) and
+  (
+    (count(*) = 1 and ./xaml:Sequence) or
+    (count(*) = 2 and ./xaml:Sequence and ./xaml:Sequence.Variables)
+  )
+]'''):
+    found(
+      MessageCategory.ERROR, 'nested-sequence', '%s (Sequence: %s -> %s))', uixaml.displayname(e),
+      uixaml.displayname(e.xpath('./xaml:Sequence', namespaces=uixaml.xamlns)[0])
+    )
+
+  for e in xpath(r'''
+//xaml:Sequence[
+  not(ancestor::ui:CommentOut) and
+  count(*[not(self::xaml:Sequence.Variables) and not(self::xaml:Sequence)]) > 15
+]'''):
+    found(MessageCategory.WARNING, 'max-activities', '%s (Sequence: %s)', uixaml.displayname(e))
+
+  for e in xpath(r'''
+//xaml:TryCatch[
+  not(./xaml:TryCatch.Catches) or
+  ./xaml:TryCatch.Catches/xaml:Catch[count(./xaml:ActivityAction/*) < 2]
+]'''):
+    found(MessageCategory.ERROR, 'empty-catch', '%s (TryCatch: %s)', uixaml.displayname(e))
+
+  for e in xpath('//xaml:If[not(ancestor::ui:CommentOut)]//xaml:If//xaml:If'):
+    found(
+      MessageCategory.WARNING, 'nested-if', '%s (If: %s, Condition: %s)',
+      uixaml.displayname(e), e.get('Condition')
+    )
+
+  for e in xpath('//ui:ExcelApplicationScope[not(@Visible) or @Visible != "False"]'):
+    found(
+      MessageCategory.WARNING, 'no-visible-excel', '%s (Excel Application Scope: %s, File: %s)',
+      uixaml.displayname(e), e.get('WorkbookPath')
+    )
+
+  wbactivities = map(lambda a: '//ui:ExcelApplicationScope//%s' % a, uixaml.wbactivities)
+  for e in xpath('|'.join(wbactivities)):
+    scope = e.xpath('ancestor::ui:ExcelApplicationScope[1]', namespaces=uixaml.xamlns)[0]
+    found(
+      MessageCategory.ERROR, 'workbook-in-excel', '%s (Excel Application Scope: %s, Activity: %s))',
+      uixaml.displayname(scope), uixaml.displayname(e)
+    )
+
+  for e in xpath('//ui:OpenApplication[@FileName]|//ui:StartProcess[@FileName]'):
+    filepath = e.get('FileName').lower()
+
+    if 'excel.exe' in filepath:
+      found(MessageCategory.ERROR, 'run-excel', '%s (Activity: %s)', uixaml.displayname(e))
+    if 'winword.exe' in filepath:
+      found(MessageCategory.ERROR, 'run-word', '%s (Activity: %s)', uixaml.displayname(e))
+    if 'iexplore.exe' in filepath or 'firefox.exe' in filepath or 'chrome.exe' in filepath:
+      found(MessageCategory.ERROR, 'run-browser', '%s (Activity: %s)', uixaml.displayname(e))
+
+  for e in xpath('//ui:SendHotkey[@SpecialKey = "False" and @Key != "{x:Null}"]'):
+    key = e.get('Key').strip()
+    if len(key) > 1 and key.lower() in uixaml.specialkey:
+      found(
+        MessageCategory.ERROR, 'false-specialkey', '%s (SendHotkey: %s, Key: %s)',
+        uixaml.displayname(e), key
+      )
+
+  for e in xpath('//ui:SendHotkey[not(@Key) or @Key = "{x:Null}"]'):
+    found(MessageCategory.ERROR, 'empty-specialkey', '%s (SendHotkey: %s)', uixaml.displayname(e))
+
+  for e in xpath('//ui:SendHotkey[@KeyModifiers="Alt" and @Key="f4" and @SpecialKey="True"]'):
+    found(MessageCategory.ERROR, 'no-altf4', '%s (SendHotkey: %s)', uixaml.displayname(e))
+
+  for e in xpath(
+    '//ui:SendHotkey[%s]/ui:SendHotkey.Target/ui:Target[not(@Selector) or @Selector = "{x:Null}"]' %
+    ' and '.join(map(lambda s: 'not(ancestor::%s)' % s, uixaml.wndscopes))
+  ):
+    found(
+      MessageCategory.WARNING, 'empty-selector-sendhotkey', '%s (SendHotkey: %s)',
+      uixaml.displayname(e)
+    )
+
+  for e in xpath('//ui:TypeInto[@Text and (not(@SimulateType) or @SimulateType = "False")]'):
+    text = e.get('Text')
+
+    if text[:1] == '[':
+      found(
+        MessageCategory.WARNING, 'kana-typeinto-vb', '%s (TypeInto: %s, Text: %s)',
+        uixaml.displayname(e), text
+      )
+    elif re.search(r'[\uff65-\uff9f]', text):
+      found(
+        MessageCategory.ERROR, 'kana-typeinto', '%s (TypeInto: %s, Text: %s)',
+        uixaml.displayname(e), text
+      )
+
+  for e in xpath('//xaml:*[@Condition]'):
+    condition = e.get('Condition').lower()
+    normalized_condition = re.sub(r'".*?"', '', condition)
+
+    if ' and ' in normalized_condition or ' or ' in normalized_condition:
+      found(
+        MessageCategory.ERROR, 'no-and-or', '%s (Activity: %s, Condition: %s)',
+        uixaml.displayname(e), condition
+      )
+
+  for e in xpath('//ui:*[@Selector and @Selector != "{x:Null}"]'):
+    selector = e.get('Selector')
+
+    if selector[:1] == '<':
+      selxml = etree.fromstring('<selector xmlns:omit="omit">%s</selector>' % selector)
+      etree.strip_attributes(selxml, '{omit}*')
+      normalized_selector = etree.tostring(selxml, encoding='unicode')
+    else:
+      normalized_selector = selector
+
+    if re.search(r'''title=('[^']+|"[^"]+)\.([0-9a-zA-Z]{3,4}\b|\*)''', normalized_selector):
+      found(
+        MessageCategory.ERROR, 'selector-extensions', '%s (Activity: %s, Selector: %s)',
+        uixaml.displayname(e), selector
+      )
+    if re.search(r'''cls=['"]windowsforms10\.''', normalized_selector, re.IGNORECASE):
+      found(
+        MessageCategory.ERROR, 'selector-windowsforms', '%s (Activity: %s, Selector: %s)',
+        uixaml.displayname(e), selector
+      )
+
+  return results
+
+
+# Results of XPath queries for each XAML file of the project ({file name: results})
+def expected_results() -> dict:
+  ssdir = os.path.join(PROJECTDIR, '.screenshots')
+  stored = set(map(lambda f: os.path.splitext(f)[0], os.listdir(ssdir)))
+
+  return {
+    f: xpath_lint(os.path.join(PROJECTDIR, f), stored)
+    for f in os.listdir(PROJECTDIR) if f.endswith('.xaml')
+  }
+
+
+@pytest.mark.parametrize('options', [
+  {},
+  {'lowmemory': True},
+  {'jobs': 2},
+  {'budget': uilint.Budget(60, None)},
+], ids=['walk', 'low-memory', 'jobs', 'budget'])
+def test_walk_matches_xpath(options):
+  uilint.load_translation('en')
+
+  actual = {}
+  for result in uilint.lint_paths([PROJECTDIR], disable=GRAPH_RULES, **options):
+    actual.setdefault(os.path.basename(result.file), []).append((result.category, result.message))
+
+  expected = expected_results()
+  assert any(expected.values())
+
+  for f, results in expected.items():
+    assert actual.get(f, []) == results, f
+
+  assert set(actual) <= set(expected)
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+import os
+import sys
+import argparse
+import json
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from xml.sax.saxutils import quoteattr
+from lxml import etree
+
+import uilint
+import uixaml
+
+# Leaf activities in generated workflows (weighted by frequency in usual projects)
+leaves = (
+  ('ui:Click', 20), ('ui:TypeInto', 15), ('ui:SendHotkey', 8), ('ui:LogMessage', 15),
+  ('Assign', 20), ('ui:ReadRange', 3), ('ui:WriteCell', 3), ('ui:StartProcess', 2),
+  ('ui:MessageBox', 2), ('ui:GetPassword', 1), ('TerminateWorkflow', 1),
+  ('ui:InvokeWorkflowFile', 5), ('Delay', 5),
+)
+
+# Container activities in generated workflows (weighted by frequency in usual projects)
+containers = (
+  ('Sequence', 30), ('If', 20), ('TryCatch', 8), ('Flowchart', 5), ('While', 5),
+  ('ui:ExcelApplicationScope', 4), ('ui:WindowScope', 6), ('ui:OpenBrowser', 3),
+  ('ui:CommentOut', 3),
+)
+
+# Selectors in generated workflows (copy-pasted selectors are usual in real projects)
+selectors = (
+  "<wnd app='excel.exe' cls='XLMAIN' title='Book1.xlsx - Excel' />",
+  "<wnd app='notepad.exe' cls='Notepad' title='*' /><wnd aaname='Text Editor' />",
+  "<html app='chrome.exe' title='Login' /><webctrl id='user' tag='INPUT' />",
+  "<html app='chrome.exe' title='Login' /><webctrl id='password' tag='INPUT' />",
+  "<wnd app='app.exe' cls='WindowsForms10.Window.8.app.0.141b42a_r9_ad1' />",
+  "<wnd app='app.exe' omit:title='Untitled' /><ctrl name='OK' role='push button' />",
+  "<wnd app='sap.exe' title='SAP Easy Access' /><sap id='wnd[0]/tbar[0]/okcd' />",
+  '[str_Selector]',
+)
+
+# Conditions in generated workflows
+conditions = (
+  'i &lt; 10', 'str_Status = &quot;OK&quot;', 'a AndAlso b', 'a And b',
+  'str_Text = &quot;x and y&quot;', 'dt_Table.Rows.Count &gt; 0 OrElse b', 'x Or y',
+)
+
+
+# Generator of a synthetic UiPath project
+class Generator:
+  def __init__(
+    self, files: int = 50, depth: int = 8, activities: int = 10, selectors: float = 0.5,
+    screenshots: int = 100, seed: int = 0
+  ) -> None:
+    self.files = files  # Number of XAML files
+    self.depth = depth  # Max nesting depth of containers
+    self.activities = activities  # Max number of activities in a container
+    self.selector_density = selectors  # Ratio of UI activities which have a selector
+    self.screenshots = screenshots  # Number of screenshot files
+    self.random = random.Random(seed)
+    self.idref = 0
+
+  # Get parameters of the generator
+  def params(self) -> dict:
+    return {
+      'files': self.files,
+      'depth': self.depth,
+      'activities': self.activities,
+      'selectors': self.selector_density,
+      'screenshots': self.screenshots,
+    }
+
+  # Generate a project into the directory
+  def generate(self, projectdir: str) -> None:
+    ssdir = os.path.join(projectdir, '.screenshots')
+    os.makedirs(ssdir, exist_ok=True)
+
+    # 10% of screenshots are orphaned and 10% of references are missing
+    self.hashes = ['%032x' % self.random.getrandbits(128) for i in range(self.screenshots)]
+    for ss in self.hashes[:self.screenshots * 9 // 10]:
+      with open(os.path.join(ssdir, '%s.png' % ss), 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n' + ss.encode('ascii'))
+
+    self.hashes = self.hashes[self.screenshots // 10:]
+
+    self.workflows = ['Main.xaml'] + [
+      os.path.join('Workflows', 'Workflow%04d.xaml' % i) for i in range(1, self.files)
+    ]
+
+    with open(os.path.join(projectdir, 'project.json'), 'w', encoding='utf-8') as f:
+      json.dump({'name': 'Benchmark', 'main': 'Main.xaml', 'projectVersion': '1.0.0'}, f)
+
+    for workflow in self.workflows:
+      path = os.path.join(projectdir, workflow)
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+
+      with open(path, 'w', encoding='utf-8') as f:
+        f.write(self.xaml(os.path.splitext(os.path.basename(workflow))[0]))
+
+  # Get a XAML document
+  def xaml(self, name: str) -> str:
+    self.idref = 0
+
+    return '\n'.join((
+      '<Activity mc:Ignorable="sap sap2010" x:Class="%s"' % name,
+      '  xmlns="%s"' % uixaml.xamlns['xaml'],
+      '  xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"',
+      '  xmlns:sap2010="%s"' % uixaml.xamlns['sap2010'],
+      '  xmlns:ui="%s"' % uixaml.xamlns['ui'],
+      '  xmlns:x="%s">' % uixaml.xamlns['x'],
+      self.container('Sequence', self.depth),
+      '</Activity>',
+      '',
+    ))
+
+  # Get common attributes of an activity
+  def attrs(self, tag: str) -> str:
+    self.idref += 1
+    localname = tag.split(':')[-1]
+
+    return 'DisplayName=%s sap2010:WorkflowViewState.IdRef="%s_%d"' % (
+      quoteattr('%s %d' % (localname, self.idref)), localname, self.idref
+    )
+
+  # Get ViewState of an activity (ignored by rules but it is in every workflow)
+  def viewstate(self) -> str:
+    return (
+      '<sap2010:WorkflowViewStateService.ViewState>'
+      '<scg:Dictionary x:TypeArguments="x:String, x:Object" '
+      'xmlns:scg="clr-namespace:System.Collections.Generic;assembly=mscorlib">'
+      '<x:Boolean x:Key="IsExpanded">True</x:Boolean>'
+      '</scg:Dictionary>'
+      '</sap2010:WorkflowViewStateService.ViewState>'
+    )
+
+  # Get a Target element of an UI activity
+  def target(self, tag: str) -> str:
+    if self.random.random() < self.selector_density:
+      selector = quoteattr(self.random.choice(selectors))
+    else:
+      selector = '"{x:Null}"'
+
+    return '<%s.Target><ui:Target Selector=%s WaitForReady="INTERACTIVE" /></%s.Target>' % (
+      tag, selector, tag
+    )
+
+  # Get an InformativeScreenshot attribute
+  def screenshot(self) -> str:
+    if self.hashes and self.random.random() < 0.5:
+      return ' InformativeScreenshot="%s"' % self.random.choice(self.hashes)
+
+    return ''
+
+  # Get a leaf activity
+  def leaf(self) -> str:
+    tag = self.choice(leaves)
+    attrs = self.attrs(tag)
+
+    if tag == 'ui:Click':
+      return '<ui:Click %s%s>%s</ui:Click>' % (attrs, self.screenshot(), self.target(tag))
+    if tag == 'ui:TypeInto':
+      text = self.random.choice(('user01', '[str_Password]', '\uff83\uff7d\uff84', 'Hello'))
+      simulate = self.random.choice(('True', 'False', None))
+      return '<ui:TypeInto %s Text=%s%s%s>%s</ui:TypeInto>' % (
+        attrs, quoteattr(text), '' if simulate is None else ' SimulateType="%s"' % simulate,
+        self.screenshot(), self.target(tag)
+      )
+    if tag == 'ui:SendHotkey':
+      key = self.random.choice(('enter', 'tab', 'f4', 'a', '{x:Null}'))
+      return '<ui:SendHotkey %s Key="%s" KeyModifiers="%s" SpecialKey="%s">%s</ui:SendHotkey>' % (
+        attrs, key, self.random.choice(('None', 'Alt', 'Ctrl')),
+        self.random.choice(('True', 'False')), self.target(tag)
+      )
+    if tag == 'ui:StartProcess':
+      filename = self.random.choice(('excel.exe', 'chrome.exe', 'C:\\Tools\\tool.exe'))
+      return '<ui:StartProcess %s FileName="%s" />' % (attrs, filename)
+    if tag == 'ui:MessageBox':
+      return '<ui:MessageBox %s Text="[str_Message]" />' % attrs
+    if tag == 'ui:InvokeWorkflowFile':
+      workflow = self.random.choice(self.workflows)
+      return '<ui:InvokeWorkflowFile %s WorkflowFileName="%s" />' % (attrs, workflow)
+    if tag == 'Assign':
+      return (
+        '<Assign %s><Assign.To><OutArgument x:TypeArguments="x:String">[str_Value]</OutArgument>'
+        '</Assign.To><Assign.Value><InArgument x:TypeArguments="x:String">[str_Text.Trim]'
+        '</InArgument></Assign.Value></Assign>'
+      ) % attrs
+    if tag in ('ui:ReadRange', 'ui:WriteCell'):
+      return '<%s %s SheetName="Sheet1" />' % (tag, attrs)
+    if tag == 'TerminateWorkflow':
+      return '<TerminateWorkflow %s Reason="Unexpected error" />' % attrs
+
+    return '<%s %s />' % (tag, attrs)
+
+  # Get a container activity (or a leaf activity if it is deep enough)
+  def activity(self, depth: int) -> str:
+    if depth <= 0 or self.random.random() < 0.6:
+      return self.leaf()
+
+    return self.container(self.choice(containers), depth)
+
+  # Get a container activity
+  def container(self, tag: str, depth: int) -> str:
+    attrs = self.attrs(tag)
+    body = ''.join(
+      self.activity(depth - 1) for i in range(self.random.randint(0, self.activities))
+    )
+
+    if tag == 'Sequence':
+      variables = ''
+      if self.random.random() < 0.3:
+        variables = (
+          '<Sequence.Variables><Variable x:TypeArguments="x:String" Name="str_Value" />'
+          '</Sequence.Variables>'
+        )
+      return '<Sequence %s>%s%s%s</Sequence>' % (attrs, variables, self.viewstate(), body)
+    if tag == 'If':
+      return '<If %s Condition=%s><If.Then>%s</If.Then><If.Else>%s</If.Else></If>' % (
+        attrs, '"%s"' % self.random.choice(conditions),
+        self.container('Sequence', depth - 1), self.activity(depth - 1)
+      )
+    if tag == 'While':
+      return '<While %s Condition="%s">%s</While>' % (
+        attrs, self.random.choice(conditions), self.container('Sequence', depth - 1)
+      )
+    if tag == 'TryCatch':
+      catch = self.activity(depth - 1) if self.random.random() < 0.8 else ''
+      return (
+        '<TryCatch %s><TryCatch.Try>%s</TryCatch.Try><TryCatch.Catches>'
+        '<Catch x:TypeArguments="s:Exception" xmlns:s="clr-namespace:System;assembly=mscorlib">'
+        '<ActivityAction x:TypeArguments="s:Exception">'
+        '<ActivityAction.Argument><DelegateInArgument x:TypeArguments="s:Exception" Name="ex" />'
+        '</ActivityAction.Argument>%s</ActivityAction></Catch></TryCatch.Catches></TryCatch>'
+      ) % (attrs, self.container('Sequence', depth - 1), catch)
+    if tag == 'Flowchart':
+      steps = []
+      count = self.random.randint(1, 4)
+      for i in range(count):
+        self.idref += 1
+        name = '__ReferenceID%d' % self.idref
+        target = name if self.random.random() < 0.1 else '__ReferenceID%d' % (self.idref + 1)
+        following = '' if i == count - 1 else (
+          '<FlowStep.Next><x:Reference>%s</x:Reference></FlowStep.Next>' % target
+        )
+        steps.append('<FlowStep x:Name="%s">%s%s%s</FlowStep>' % (
+          name, self.viewstate(), self.activity(depth - 1), following
+        ))
+      return '<Flowchart %s>%s</Flowchart>' % (attrs, ''.join(steps))
+    if tag == 'ui:ExcelApplicationScope':
+      visible = self.random.choice(('True', 'False'))
+      return (
+        '<ui:ExcelApplicationScope %s Visible="%s" WorkbookPath="Data.xlsx">'
+        '<ui:ExcelApplicationScope.Body><ActivityAction x:TypeArguments="ui:WorkbookApplication">'
+        '%s</ActivityAction></ui:ExcelApplicationScope.Body></ui:ExcelApplicationScope>'
+      ) % (attrs, visible, self.container('Sequence', depth - 1))
+    if tag in ('ui:WindowScope', 'ui:OpenBrowser'):
+      return (
+        '<%s %s%s>%s<%s.Body><ActivityAction x:TypeArguments="x:Object">%s</ActivityAction>'
+        '</%s.Body></%s>'
+      ) % (
+        tag, attrs, self.screenshot(), self.target(tag), tag,
+        self.container('Sequence', depth - 1), tag, tag
+      )
+    if tag == 'ui:CommentOut':
+      return '<ui:CommentOut %s><ui:CommentOut.Body>%s</ui:CommentOut.Body></ui:CommentOut>' % (
+        attrs, self.container('Sequence', depth - 1)
+      )
+
+    return '<%s %s>%s</%s>' % (tag, attrs, body, tag)
+
+  # Choose an item by weights
+  def choice(self, items: tuple) -> str:
+    n = self.random.randrange(sum(map(lambda i: i[1], items)))
+    for item, weight in items:
+      if n < weight:
+        return item
+      n -= weight
+
+
+# Lint the project and return elapsed seconds and the number of results
+# (time of each rule is recorded in stats if it is given, see uilint.Stats)
+def run(projectdir: str, args, stats: uilint.Stats = None) -> tuple:
+  # Each run starts with an empty selector cache
+  uilint.selector_cache.clear()
+
+  start = time.perf_counter()
+  prj = uilint.Project(
+    projectdir, args.jobs, None, args.low_memory, uilint.select_rules(), None, None, stats
+  )
+  prj.lint()
+  elapsed = time.perf_counter() - start
+
+  return elapsed, sum(1 for r in prj.results())
+
+
+# Measure start-up time of the batch entry point (python3 -m uilint --files) for a small XAML
+# file in a new process and return seconds (median of runs)
+def startup(workdir: str, repeat: int) -> float:
+  xamlpath = os.path.join(workdir, 'Startup.xaml')
+  with open(xamlpath, 'w', encoding='utf-8') as f:
+    f.write('<Activity xmlns="%s"><Sequence DisplayName="Main" /></Activity>\n' % (
+      uixaml.xamlns['xaml']
+    ))
+
+  with open(os.path.join(workdir, 'project.json'), 'w', encoding='utf-8') as f:
+    f.write('{}\n')
+
+  env = dict(os.environ)
+  env['PYTHONPATH'] = os.pathsep.join(filter(None, (
+    os.path.dirname(os.path.abspath(uilint.__file__)), env.get('PYTHONPATH')
+  )))
+  command = [sys.executable, '-m', 'uilint', '--files', xamlpath]
+
+  elapsed = []
+  for i in range(repeat + 1):  # The first run is to write bytecode caches
+    start = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, env=env)  # Exits with 1 for errors
+    elapsed.append(time.perf_counter() - start)
+
+  return statistics.median(elapsed[1:])
+
+
+# Parse XAML files with the default parser of lxml or the tuned parser (see uilint.parse_xaml)
+# and return seconds and growth of RSS in MiB (None if it is unknown) to keep all trees
+def parse_files(xamlfiles: list, tuned: bool) -> tuple:
+  before = uilint.current_rss()
+  start = time.perf_counter()
+  trees = list(map(uilint.parse_xaml if tuned else etree.parse, xamlfiles))
+  elapsed = time.perf_counter() - start
+  after = uilint.current_rss()
+
+  return elapsed, None if before is None or not trees else after - before
+
+
+# Measure time and memory to parse all XAML files of the project with both parsers
+# (median of runs, see parse_files)
+# Each run is in a new process not to reuse memory freed by the previous run.
+def parsers(projectdir: str, repeat: int) -> dict:
+  xamlfiles = uilint.find_files(projectdir)[0]
+
+  env = dict(os.environ)
+  env['PYTHONPATH'] = os.pathsep.join(filter(None, (
+    os.path.dirname(os.path.abspath(__file__)), env.get('PYTHONPATH')
+  )))
+
+  report = {}
+
+  for name, tuned in (('default', False), ('tuned', True)):
+    command = [
+      sys.executable, '-c',
+      'import json, sys, uibench; '
+      'print(json.dumps(uibench.parse_files(json.load(sys.stdin), %s)))' % tuned
+    ]
+
+    runs = []
+    for i in range(repeat):
+      process = subprocess.run(
+        command, input=json.dumps(xamlfiles).encode('utf-8'), stdout=subprocess.PIPE, env=env,
+        check=True
+      )
+      runs.append(json.loads(process.stdout.decode('utf-8')))
+
+    report[name] = {
+      'seconds': statistics.median(map(lambda r: r[0], runs)),
+      'rss': None if runs[0][1] is None else statistics.median(map(lambda r: r[1], runs)),
+    }
+
+  return report
+
+
+# Compare the report with the baseline and return True if there is no regression
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+  if report['params'] != baseline.get('params'):
+    print('Warning: Parameters are different from the baseline.')
+
+  ok = True
+  rows = [('total', report['total'], baseline.get('total'))]
+  rows += [(name, t, baseline.get('rules', {}).get(name)) for name, t in report['rules'].items()]
+
+  print('%-28s %10s %10s %8s' % ('', 'baseline', 'current', 'ratio'))
+  for name, current, base in rows:
+    if base:
+      ratio = current / base
+      print('%-28s %9.3fs %9.3fs %7.2fx' % (name, base, current, ratio))
+
+      if name == 'total' and ratio > 1 + tolerance:
+        ok = False
+    else:
+      print('%-28s %10s %9.3fs' % (name, '-', current))
+
+  return ok
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Benchmark of UiLint with a synthetic UiPath project.'
+  )
+  parser.add_argument('--files', help='Number of XAML files. (default: 50)', type=int, default=50)
+  parser.add_argument('--depth', help='Max nesting depth. (default: 8)', type=int, default=8)
+  parser.add_argument(
+    '--activities',
+    help='Max number of activities in a container. (default: 10)',
+    type=int,
+    default=10
+  )
+  parser.add_argument(
+    '--selectors',
+    help='Ratio of UI activities which have a selector. (default: 0.5)',
+    type=float,
+    default=0.5
+  )
+  parser.add_argument(
+    '--screenshots',
+    help='Number of screenshot files. (default: 100)',
+    type=int,
+    default=100
+  )
+  parser.add_argument('--seed', help='Seed of random numbers. (default: 0)', type=int, default=0)
+  parser.add_argument('--repeat', help='Number of runs. (default: 3)', type=int, default=3)
+  parser.add_argument('-j', '--jobs', help='Number of processes. (default: 1)', type=int, default=1)
+  parser.add_argument('--low-memory', help='Use low memory mode.', action='store_true')
+  parser.add_argument('--baseline', help='Compare results with the baseline file.', metavar='FILE')
+  parser.add_argument(
+    '--tolerance',
+    help='Acceptable slowdown against the baseline. (default: 0.2)',
+    type=float,
+    default=0.2
+  )
+  parser.add_argument(
+    '--startup-budget',
+    help='Acceptable start-up time of the batch entry point in seconds. (default: 0.3)',
+    type=float,
+    default=0.3
+  )
+  parser.add_argument('--save', help='Save results to the file as a baseline.', metavar='FILE')
+  parser.add_argument(
+    '--project',
+    help='Directory to generate the project and keep it. (default: temporary directory)',
+    metavar='DIR'
+  )
+  arg = parser.parse_args()
+
+  uilint.load_translation('en')
+
+  projectdir = arg.project or tempfile.mkdtemp(prefix='uibench-')
+  startupdir = tempfile.mkdtemp(prefix='uibench-startup-')
+
+  try:
+    generator = Generator(
+      arg.files, arg.depth, arg.activities, arg.selectors, arg.screenshots, arg.seed
+    )
+    generator.generate(projectdir)
+
+    size = sum(
+      os.path.getsize(os.path.join(d, f))
+      for d, dirs, files in os.walk(projectdir) for f in files if f.endswith('.xaml')
+    )
+    print('Project: %s (%d files, %.1f MiB)' % (projectdir, arg.files, size / 1024 / 1024))
+
+    # End-to-end time of Project.lint (median of runs)
+    elapsed = []
+    for i in range(arg.repeat):
+      seconds, count = run(projectdir, arg)
+      elapsed.append(seconds)
+
+    cachestats = {'hits': uilint.selector_cache.hits, 'misses': uilint.selector_cache.misses}
+
+    # Time of each rule (in a separate run as measuring each call has an overhead)
+    stats = uilint.Stats()
+    run(projectdir, arg, stats)
+    rss = uilint.peak_rss()
+
+    report = {
+      'params': generator.params(),
+      'startup': startup(startupdir, arg.repeat),
+      'parsers': parsers(projectdir, arg.repeat),
+      'total': statistics.median(elapsed),
+      'results': count,
+      'rules': dict(map(lambda r: (r[0], r[1]['wall']), stats.report()['rules'].items())),
+      'peak_rss': None if rss is None else max(rss.values()),
+      'selector_cache': cachestats,
+    }
+
+    print('Lint: %.3fs (median of %d runs), %d results, peak RSS: %s MiB' % (
+      report['total'], arg.repeat, count,
+      '-' if report['peak_rss'] is None else '%.1f' % report['peak_rss']
+    ))
+    print('Selector cache: %(hits)d hits, %(misses)d misses' % report['selector_cache'])
+    print('Start-up: %.3fs (budget: %.3fs)' % (report['startup'], arg.startup_budget))
+
+    default, tuned = report['parsers']['default'], report['parsers']['tuned']
+    print('Parse: %.3fs -> %.3fs (saved %.0f%%), trees: %s -> %s MiB (saved %s)' % (
+      default['seconds'], tuned['seconds'], (1 - tuned['seconds'] / default['seconds']) * 100,
+      '-' if default['rss'] is None else '%.1f' % default['rss'],
+      '-' if tuned['rss'] is None else '%.1f' % tuned['rss'],
+      '-' if not default['rss'] or tuned['rss'] is None
+      else '%.0f%%' % ((1 - tuned['rss'] / default['rss']) * 100)
+    ))
+
+    ok = report['startup'] <= arg.startup_budget
+    if arg.baseline is not None:
+      with open(arg.baseline, encoding='utf-8') as f:
+        ok = compare(report, json.load(f), arg.tolerance) and ok
+    else:
+      for name, seconds in report['rules'].items():
+        print('%-28s %9.3fs' % (name, seconds))
+
+    if arg.save is not None:
+      with open(arg.save, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    if not ok:
+      sys.exit(1)
+  finally:
+    if arg.project is None:
+      shutil.rmtree(projectdir, ignore_errors=True)
+
+    shutil.rmtree(startupdir, ignore_errors=True)
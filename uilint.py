@@ -2,472 +2,3305 @@
 import os
 import re
 import sys
+import abc
 import argparse
 import enum
 import gettext
+import hashlib
+import html
+import importlib
+import json
+import mmap
+import pickle
+import posixpath
 import subprocess
-from collections import namedtuple
-from functools import reduce
-from glob import glob  # Python >= 3.5
+import threading
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from contextlib import contextmanager, suppress
+from functools import lru_cache
+from itertools import chain, islice, repeat
+from typing import TYPE_CHECKING
+from fnmatch import fnmatch
 from lxml import etree
 
 import uixaml
 
+if TYPE_CHECKING:
+  from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor  # See thread_pool
+
+try:
+  # File system events for watch mode (polling is used if it is not installed)
+  from watchdog.events import FileSystemEventHandler
+  from watchdog.observers import Observer
+except ImportError:
+  Observer = None
+
+__version__ = '0.1.0'
+
 # Tuple for result records (Result for the project, ResultXAML for each XAMLs)
-Result = namedtuple('Result', ('file', 'category', 'message'))
+# Rules of uilint yield Finding instead of ResultXAML (ResultXAML is for plugins).
+# rule of Result is the ID of the rule (None for results of plugins, see as_result).
+Result = namedtuple('Result', ('file', 'category', 'message', 'rule'))
+Result.__new__.__defaults__ = (None,)
 ResultXAML = namedtuple('ResultXAML', ('category', 'message'))
 
 
+# Budget to lint a XAML file (see lint_xaml)
+# time: Limit of wall-clock time in seconds, memory: Limit of RSS growth in MiB (None: unlimited)
+Budget = namedtuple('Budget', ('time', 'memory'))
+
+
+# Compact record of a result for each XAMLs kept until results are shown
+# The message is formatted (and translated) only when it is referred.
+# rule: ID of the rule ("rule:<ID>" is the message in translations)
+# category: MessageCategory
+# form: Format of the message (the first %s is for the translated message of the rule)
+# params: Tuple of other values for the format (e.g. DisplayName of the activity)
+class Finding:
+  __slots__ = ('rule', 'category', 'form', 'params')
+
+  def __init__(self, rule: str, category: 'MessageCategory', form: str, params: tuple) -> None:
+    self.rule = sys.intern(rule)
+    self.category = category
+    self.form = form
+    self.params = params
+
+  @property
+  def message(self) -> str:
+    return self.form % ((_('rule:%s' % self.rule),) + self.params)
+
+
+# Convert a result of the file (Result, Finding or ResultXAML) to Result
+def as_result(path: str, result) -> Result:
+  if isinstance(result, Result):
+    return result
+
+  return Result(path, result.category, result.message, getattr(result, 'rule', None))
+
+
+# Language of messages (see load_translation())
+language = 'en'
+
+# Function to translate messages for the language (loaded by the first call of _())
+translation = None
+
+
+# Select the language of messages
+# Translation texts are loaded lazily when a message is translated by _() for the first time,
+# so linting without any messages to show does not pay for it.
+# It is also used to initialize worker processes because they may not inherit it from the parent.
+def load_translation(lang: str) -> None:
+  global language, translation
+
+  language = lang
+  translation = None
+
+
+# Translate the message (e.g. _('rule:nested-if'))
+def _(message: str) -> str:
+  global translation
+
+  if translation is None:
+    translation = gettext.translation(
+      'messages',
+      localedir=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locale'),
+      languages=[language, 'en']
+    ).gettext
+
+  return translation(message)
+
+
+# Initialize a worker process (see Project.lint_files)
+def init_worker(lang: str, modules: list, selectors: dict = None) -> None:
+  load_translation(lang)
+  load_plugins(modules)
+
+  # Start with selector verdicts known to the main process and send back new ones
+  selector_cache.update(selectors or {})
+  selector_cache.drain()
+
+
+# Create a pool of worker processes to lint XAML files (it can be shared by projects)
+# Plugins should be loaded before creating it.
+def worker_pool(jobs: int) -> 'ProcessPoolExecutor':
+  from concurrent.futures import ProcessPoolExecutor  # Slow to import (see thread_pool)
+
+  return ProcessPoolExecutor(
+    max_workers=jobs,
+    initializer=init_worker,
+    initargs=(language, plugins, dict(selector_cache.entries))
+  )
+
+
+# Create a pool of threads for I/O (e.g. hashing and removing files)
+# concurrent.futures is imported only when it is needed because it takes a noticeable part of
+# the start-up time (it imports logging and multiprocessing).
+def thread_pool(jobs: int) -> 'ThreadPoolExecutor':
+  from concurrent.futures import ThreadPoolExecutor
+
+  return ThreadPoolExecutor(max_workers=jobs)
+
+
 # Enum for message category of results
 class MessageCategory(enum.Enum):
   ERROR = enum.auto()
   WARNING = enum.auto()
 
 
-# Linter class for the project
-class Project:
-  def __init__(self, projectdir: str) -> None:
-    # Errors/Warnings (should be accessed via self.results() method)
-    self._results = []
+# Linter class for the project
+class Project:
+  def __init__(
+    self, projectdir: str, jobs: int = 1, cachedir: str = None, lowmemory: bool = False,
+    ruleset: 'RuleSet' = None, only: list = None, executor: 'ProcessPoolExecutor' = None,
+    stats: 'Stats' = None, budget: Budget = None, baseline: 'Baseline' = None
+  ) -> None:
+    # Errors/Warnings (should be accessed via self.results() method)
+    self._results = []
+
+    # Path to project directory
+    if not os.path.isdir(projectdir):
+      raise ValueError('Given project directory is not found or not a directory.')
+
+    self.projectdir = projectdir
+
+    # Path to the directory of screenshots
+    self.ssdir = os.path.join(self.projectdir, '.screenshots')
+
+    # Path to project.json
+    self.prjfile = os.path.join(self.projectdir, 'project.json')
+
+    # Performance statistics (None means they are not recorded)
+    self.stats = stats
+
+    # Get all XAML files including sub-directories (see find_files)
+    with self.measure('discovery'):
+      ignore = load_ignore(os.path.join(self.projectdir, IGNORE_FILE))
+      self.xamlfiles, screenshots, self.excluded = find_files(self.projectdir, ignore)
+
+    # List of XAML classes for each XAML file
+    self.xamls = []
+
+    # XAML files excluded from lint (by IGNORE_FILE or in PRUNED_DIRS) are only scanned, since
+    # their screenshots and invoked workflows are still in use (see scan_xaml)
+    self.excluded_xamls = []
+
+    # Set of screenshots in the project (hash only, without extensions)
+    self.ss_inuse = set()  # Seen in all XAML files
+    self.ss_stored = set(map(lambda f: os.path.splitext(f)[0], screenshots))  # Stored in ssdir
+
+    # Names of screenshot files in ssdir and their index (see screenshot_index())
+    self.ss_files = screenshots
+    self.ss_index = None
+
+    # Number of worker processes to lint XAML files (0 means the number of CPUs)
+    if jobs < 0:
+      raise ValueError('Number of jobs should be 0 or more.')
+
+    self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+    # Directory to store the lint cache (None means the cache is disabled)
+    self.cachedir = cachedir
+
+    # Parse XAML files in a streaming manner and keep only their results (see lint_xaml())
+    self.lowmemory = lowmemory
+
+    # Rules to be evaluated (all rules by default)
+    self.ruleset = ruleset if ruleset is not None else select_rules()
+
+    # XAML files to be linted (None means all XAML files)
+    # Other XAML files are only scanned for in-use screenshots and invoked workflows
+    # (see scan_xaml).
+    self.only = None if only is None else set(map(lambda f: os.path.realpath(f), only))
+
+    # Budget to lint each XAML file (None means unlimited)
+    self.budget = budget
+
+    # XAML files whose lint was aborted by the budget
+    self.aborted = []
+
+    # Shard of XAML files to be linted as (0-based index, number of shards) (see shard())
+    # and positions of XAML files in all XAML files ({path: position}, None if not sharded)
+    self.sharding = (0, 1)
+    self.positions = None
+
+    # Findings of the graph of workflow invocations as a list of (path, Finding) (see check_invokes)
+    self.graph = []
+
+    # Known findings not to be reported (None means all findings are reported, see Baseline)
+    self.baseline = baseline
+
+    # Worker pool shared with other projects (see worker_pool, jobs should be its max_workers)
+    # A pool is created for each lint if it is None.
+    self.executor = executor
+
+    # States for update(): start time of the last lint (in ns), states of XAML files
+    # ({path: (mtime, size)}) and reference counts of in-use screenshots
+    self.linted_ns = None
+    self.filestats = None
+    self.ss_refs = None
+
+  # Context manager to measure time of the phase if statistics are recorded (see Stats.phase)
+  def measure(self, name: str):
+    return self.stats.phase(name) if self.stats is not None else nophase
+
+  # Get all stored screenshot files (i.e. return self.ss_stored)
+  # They are listed by find_files, so an empty set means there are no screenshot files.
+  def stored_screenshots(self) -> set:
+    return self.ss_stored
+
+  # Get the index of screenshot files (see ScreenshotIndex)
+  # Only new and changed files are hashed (the index is kept in cachedir if it is given).
+  def screenshot_index(self) -> 'ScreenshotIndex':
+    if self.ss_index is None:
+      self.ss_index = ScreenshotIndex(self)
+
+    with self.measure('screenshots'):
+      self.ss_index.update(self.ss_files)
+
+    return self.ss_index
+
+  # Get all in-use screenshots (i.e. return self.ss_inuse)
+  # Screenshots in excluded XAML files are also in use.
+  def inuse_screenshots(self) -> set:
+    if not any(self.ss_inuse):
+      self.ss_inuse = set().union(*map(
+        lambda xaml: xaml.inuse_screenshots(), chain(self.xamls, self.excluded_xamls)
+      ))
+
+    return self.ss_inuse
+
+  # Convert screenshot hash to actual file path
+  def screenshot_path(self, hash: str) -> str:
+    return os.path.join(self.ssdir, '%s.png' % hash)
+
+  # Lint only the index-th (0-based) shard of count shards of XAML files (see shard_files)
+  def shard(self, index: int, count: int) -> None:
+    self.sharding = (index, count)
+    self.positions = dict(map(lambda f: (f[1], f[0]), enumerate(self.xamlfiles)))
+    self.xamlfiles = shard_files(self.projectdir, self.xamlfiles, index, count)
+
+  # Get results and in-use screenshots as a dict to be saved in a partial results file
+  # Each result is [position of the file in all XAML files (-1 for the project), file,
+  # category, message, rule] (see merge_partials). Invoked workflows of excluded XAML files are
+  # saved by every shard. Results of the graph of workflow invocations are not saved even if the
+  # project is not sharded, since merge_partials checks the graph of all shards.
+  def partial(self) -> dict:
+    positions = self.positions
+    if positions is None:
+      positions = dict(map(lambda f: (f[1], f[0]), enumerate(self.xamlfiles)))
+
+    return {
+      'projectdir': self.projectdir,
+      'shard': list(self.sharding),
+      'results': [
+        [positions.get(r.file, -1), r.file, r.category.name, r.message, r.rule]
+        for r in self.report(self.findings(False))
+      ],
+      'inuse_screenshots': sorted(self.inuse_screenshots()),
+      'invokes': [[positions[xaml.xamlpath], xaml.xamlpath, xaml.invokes] for xaml in self.xamls],
+      'excluded': [[xaml.xamlpath, xaml.invokes] for xaml in self.excluded_xamls],
+      'graph_rules': sorted(filter(lambda r: r in self.ruleset, INVOKE_RULES)),
+    }
+
+  # Get lint results including results of XAML files (as an iterator of Result)
+  # Results of the graph of workflow invocations follow them as it depends on all XAML files.
+  def results(self):
+    return self.report(self.findings())
+
+  # Get all findings as an iterator of (path, Result, Finding or ResultXAML) in the same order
+  # as results(), including findings in the baseline (e.g. to update the baseline)
+  # graph: Findings of the graph of workflow invocations are included or not
+  def findings(self, graph: bool = True):
+    return chain(
+      map(lambda r: (r.file, r), self._results),
+      chain.from_iterable(map(lambda xaml: xaml.findings(), self.xamls)),
+      self.graph if graph else ()
+    )
+
+  # Convert findings as (path, Result, Finding or ResultXAML) to results (Result) except ones
+  # in the baseline (their messages are never formatted)
+  def report(self, findings):
+    if self.baseline is not None:
+      findings = self.baseline.filter(findings)
+
+    return map(lambda f: as_result(*f), findings)
+
+  # Get results of the graph of workflow invocations (as an iterator of Result)
+  def graph_results(self):
+    return self.report(self.graph)
+
+  # Check the graph of workflow invocations built from invoked workflows of each XAML file
+  # It is skipped for a shard since the graph needs all XAML files (see merge_partials).
+  # Excluded XAML files are in the graph, but their findings are not reported.
+  def check_graph(self) -> None:
+    if self.positions is not None:
+      return
+
+    reported = self.only
+    if any(self.excluded):
+      reported = set(filter(
+        lambda f: self.only is None or f in self.only, map(os.path.realpath, self.xamlfiles)
+      ))
+
+    with self.measure('graph'):
+      self.graph = check_invokes(
+        self.projectdir,
+        self.xamlfiles + self.excluded,
+        dict(map(
+          lambda xaml: (xaml.xamlpath, xaml.invokes), chain(self.xamls, self.excluded_xamls)
+        )),
+        self.ruleset,
+        reported
+      )
+
+  # Get in-use screenshots and invoked workflows of the XAML file without linting it
+  def scan(self, xamlpath: str) -> 'LintedXAML':
+    xaml = LintedXAML(self, xamlpath, [], [])
+    xaml.screenshots, xaml.invokes = scan_xaml(xamlpath)
+
+    return xaml
+
+  # Linter
+  def lint(self) -> None:
+    for result in self.iterlint():
+      pass
+
+  # Linter which yields results (Result) as soon as each XAML file is linted
+  # Results are yielded in the same order as self.results().
+  def iterlint(self):
+    self.xamls = []
+    self.linted_ns = int(time.time() * 1e9)
+
+    # Check existence of project.json file
+    if 'no-project-file' in self.ruleset and not os.path.isfile(self.prjfile):
+      self._results.append(Result(
+        self.prjfile, MessageCategory.ERROR, _('rule:no-project-file'), 'no-project-file'
+      ))
+
+    yield from self.report(map(lambda r: (r.file, r), self._results))
+
+    # XAML files not to be linted are only scanned for screenshots
+    scanned = {}
+
+    with self.measure('scan'):
+      self.excluded_xamls = list(map(self.scan, self.excluded))
+
+      if self.only is not None:
+        for xamlpath in self.xamlfiles:
+          if os.path.realpath(xamlpath) not in self.only:
+            scanned[xamlpath] = self.scan(xamlpath)
+
+    # Results of unchanged XAML files are restored from the cache
+    cache = None
+    cached = {}
+
+    if self.cachedir is not None:
+      with self.measure('cache'):
+        cache = Cache(self)
+
+        for xamlpath in self.xamlfiles:
+          entry = cache.get(xamlpath) if xamlpath not in scanned else None
+
+          if entry is not None:
+            cached[xamlpath] = LintedXAML(self, xamlpath, *entry)
+
+    # Check all other XAML files
+    # Files aborted in previous runs are linted first not to be left at last in worker processes.
+    # Linted files are kept until their turn comes to yield results in order of xamlfiles.
+    pending = list(filter(lambda f: f not in cached and f not in scanned, self.xamlfiles))
+
+    if cache is not None and any(cache.aborted):
+      pending.sort(key=lambda f: f not in cache.aborted)
+
+    linted = self.lint_files(pending)
+    done = {}
+
+    for xamlpath in self.xamlfiles:
+      xaml = cached.get(xamlpath) or scanned.get(xamlpath)
+
+      if xaml is None:
+        with self.measure('lint'):
+          while xamlpath not in done:
+            xaml = next(linted)
+            done[xaml.xamlpath] = xaml
+
+        xaml = done.pop(xamlpath)
+
+        if xaml.stats is not None:
+          self.stats.add(xaml)
+
+        if xaml.aborted:
+          self.aborted.append(xamlpath)
+
+        if cache is not None:
+          with self.measure('cache'):
+            if xaml.aborted:
+              cache.abort(xamlpath)
+            else:
+              cache.put(xaml.xamlpath, xaml._results, xaml.ss_activities, xaml.invokes)
+
+      # Screenshots are checked at last because they depend on the whole project
+      with self.measure('screenshots'):
+        xaml.check_screenshots()
+
+      self.xamls.append(xaml)
+      yield from self.report(xaml.findings())
+
+    if cache is not None:
+      with self.measure('cache'):
+        cache.save()
+
+    self.check_graph()
+    yield from self.graph_results()
+
+  # Lint XAML files changed since the last lint() or update() again (for watch mode)
+  # Screenshot sets are updated incrementally and screenshots are checked again only for
+  # changed XAML files and XAML files which refer to added/removed screenshot files.
+  # Returns XAML files (LintedXAML) whose results may be changed in order of self.xamlfiles.
+  def update(self) -> list:
+    ignore = load_ignore(os.path.join(self.projectdir, IGNORE_FILE))
+    xamlfiles, screenshots, excluded = find_files(self.projectdir, ignore)
+
+    stats = {}
+    for xamlpath in xamlfiles:
+      try:
+        st = os.stat(xamlpath)
+      except OSError:
+        continue  # Removed after it was found
+
+      stats[xamlpath] = (st.st_mtime_ns, st.st_size)
+
+    if self.filestats is None:
+      # Files modified after the last lint() started are linted again
+      linted_ns = self.linted_ns or 0
+      self.filestats = {path: st for path, st in stats.items() if st[0] < linted_ns}
+
+    if self.ss_refs is None:
+      self.ss_refs = Counter(chain.from_iterable(map(
+        lambda xaml: xaml.inuse_screenshots(), chain(self.xamls, self.excluded_xamls)
+      )))
+      self.ss_inuse = set(self.ss_refs)
+
+    xamls = {xaml.xamlpath: xaml for xaml in self.xamls}
+    changed = list(filter(lambda f: self.filestats.get(f) != stats[f], stats))
+    removed = list(filter(lambda f: f not in stats, xamls))
+
+    self.ss_files = screenshots
+    stored = set(map(lambda f: os.path.splitext(f)[0], screenshots))
+    ss_changed = stored ^ self.ss_stored
+    self.ss_stored -= ss_changed - stored
+    self.ss_stored |= ss_changed & stored
+
+    if not changed and not removed and not ss_changed:
+      return []
+
+    # Reference counts of screenshots are updated for removed and changed files
+    touched = set()
+
+    for xamlpath in removed:
+      refs = xamls.pop(xamlpath).inuse_screenshots()
+      self.ss_refs.subtract(refs)
+      touched |= refs
+
+    linted = set()
+
+    for xamlpath in changed:
+      try:
+        xaml = lint_xaml(xamlpath, self.lowmemory, self.ruleset, False, self.budget)
+      except (OSError, ValueError, etree.XMLSyntaxError):
+        del stats[xamlpath]  # It may be being saved, so it is checked again in the next update
+        continue
+
+      xaml.project = self
+      old = xamls.get(xamlpath)
+
+      if old is not None:
+        self.ss_refs.subtract(old.inuse_screenshots())
+        touched |= old.inuse_screenshots()
+
+      self.ss_refs.update(xaml.inuse_screenshots())
+      touched |= xaml.inuse_screenshots()
+
+      xamls[xamlpath] = xaml
+      linted.add(xamlpath)
+
+    for ss in touched:
+      if self.ss_refs[ss] > 0:
+        self.ss_inuse.add(ss)
+      else:
+        self.ss_inuse.discard(ss)
+        del self.ss_refs[ss]
+
+    self.filestats = stats
+    self.xamlfiles = list(filter(lambda f: f in xamls, xamlfiles))
+    self.xamls = list(map(lambda f: xamls[f], self.xamlfiles))
+
+    # Check screenshots of changed XAML files and XAML files affected by screenshot files
+    updated = []
+
+    for xaml in self.xamls:
+      if xaml.xamlpath in linted or not ss_changed.isdisjoint(xaml.inuse_screenshots()):
+        xaml.check_screenshots()
+        updated.append(xaml)
+
+    # The graph is rebuilt from invoked workflows of each XAML file (they are not parsed again)
+    self.check_graph()
+
+    return updated
+
+  # Evaluate rules for XAML files (screenshots are not checked yet)
+  # Each XAML file is yielded as soon as it is linted in the same order as xamlfiles.
+  def lint_files(self, xamlfiles: list):
+    if self.jobs > 1 and len(xamlfiles) > 1:
+      # Parse and lint XAML files in worker processes
+      # Only LintedXAML (without parsed trees) is sent back from the workers.
+      if self.executor is not None:
+        yield from self.map_files(self.executor, xamlfiles)
+      else:
+        with worker_pool(self.jobs) as executor:
+          yield from self.map_files(executor, xamlfiles)
+    elif self.lowmemory:
+      for xamlpath in xamlfiles:
+        xaml = lint_xaml(xamlpath, True, self.ruleset, self.stats is not None, self.budget)
+        xaml.project = self
+        yield xaml
+    else:
+      # Files are read ahead in a thread while the current one is parsed and linted
+      # (a single file is read directly not to start the thread, e.g. for pre-commit)
+      # Only LintedXAML is kept in self.xamls, so the parsed tree is released after each file.
+      sources = read_ahead(xamlfiles) if len(xamlfiles) > 1 else zip(xamlfiles, repeat(None))
+
+      for xamlpath, source in sources:
+        xaml = lint_xaml(
+          xamlpath, False, self.ruleset, self.stats is not None, self.budget, source
+        )
+        xaml.project = self
+
+        yield xaml
+
+  # Lint XAML files by the worker pool (see lint_files)
+  def map_files(self, executor: 'ProcessPoolExecutor', xamlfiles: list):
+    for xaml in executor.map(
+      lint_xaml,
+      xamlfiles,
+      repeat(self.lowmemory),
+      repeat(self.ruleset),
+      repeat(self.stats is not None),
+      repeat(self.budget),
+      chunksize=max(1, min(16, len(xamlfiles) // (self.jobs * 4)))
+    ):
+      xaml.project = self
+
+      if xaml.selectors is not None:
+        selector_cache.merge(xaml.selectors)
+        xaml.selectors = None
+
+      yield xaml
+
+
+# Lint results of a XAML file without its parsed tree
+# It is small enough to send back from worker processes.
+class LintedXAML:
+  def __init__(
+    self, project: Project, xamlpath: str, results: list, screenshots: list, invokes: list = ()
+  ) -> None:
+    # Reference to the project (it is None in worker processes)
+    self.project = project
+
+    # Path to XAML file
+    self.xamlpath = xamlpath
+
+    # Errors/Warnings (can access directly if you want a list of ResultXAML)
+    self._results = results
+
+    # Activities with a screenshot as a list of (hash, DisplayName) in document order
+    self.ss_activities = screenshots
+
+    # Screenshots seen in XAML files (hash only, without extensions)
+    self.screenshots = set(map(lambda ss: ss[0], screenshots))
+
+    # Number of results by check_screenshots() at the head of self._results
+    self.ss_results = 0
+
+    # Invoked workflows as a list of (WorkflowFileName, DisplayName, names of arguments)
+    # They are edges of the graph of workflow invocations of the project (see InvokeGraph).
+    self.invokes = list(invokes)
+
+    # Selector verdicts taken in a worker process (see SelectorCache.drain)
+    self.selectors = None
+
+    # Performance statistics of the file (see ProfiledWalk.stats)
+    self.stats = None
+
+    # Lint was aborted by the budget or not (results are only the "lint-aborted" finding)
+    self.aborted = False
+
+  # Get all in-use screenshots (i.e. return self.screenshots)
+  def inuse_screenshots(self) -> set:
+    return self.screenshots
+
+  # Take results and screenshots from the walk over the XAML file
+  def collect(self, walk) -> None:
+    self._results.extend(walk.results())
+    self.ss_activities = walk.ss_activities()
+    self.screenshots = set(map(lambda ss: ss[0], self.ss_activities))
+    self.invokes = walk.invokes
+
+  # Get lint results as an iterator of Result (not ResultXAML)
+  def results(self):
+    return map(lambda r: as_result(self.xamlpath, r), self._results)
+
+  # Get findings as an iterator of (path, Finding or ResultXAML) (see Project.findings)
+  def findings(self):
+    return zip(repeat(self.xamlpath), self._results)
+
+  # Check existence of all screenshots in the project
+  # Results are placed in front of the other results as this check runs in the last.
+  def check_screenshots(self) -> None:
+    if 'no-screenshots' not in self.project.ruleset:
+      return
+
+    ss_files = self.project.stored_screenshots()
+    results = []
+
+    for sfile, activity in self.ss_activities:
+      if sfile not in ss_files:
+        results.append(Finding(
+          'no-screenshots',
+          MessageCategory.ERROR,
+          '%s (Activity: %s, Screenshot: %s)',
+          (activity, sfile)
+        ))
+
+    # Results of the previous check are replaced (see Project.update)
+    self._results[:self.ss_results] = results
+    self.ss_results = len(results)
+
+
+# Parse and lint a XAML file in a worker process (see Project.lint_files)
+# In low memory mode, the XAML file is parsed in a streaming manner and finished subtrees are
+# pruned while walking through it, so that its whole tree is never kept in memory.
+# If profile is True, performance statistics are recorded in LintedXAML.stats.
+# If the budget is exceeded, the lint is aborted and the result is only a "lint-aborted" finding
+# (screenshots and invoked workflows in the file are taken by scan_xaml).
+def lint_xaml(
+  xamlpath: str, lowmemory: bool = False, ruleset: 'RuleSet' = None, profile: bool = False,
+  budget: Budget = None, source: bytes = None
+) -> LintedXAML:
+  ruleset = ruleset if ruleset is not None else select_rules()
+  started = clock() if profile or budget is not None else None
+  limits = Limits(budget, started[0]) if budget is not None else None
+
+  try:
+    if not lowmemory:
+      linted = XAML(None, xamlpath, source)
+      parsed = clock() if profile else None
+
+      if limits is not None:
+        limits.check()  # Parsing a file cannot be interrupted
+
+      walk = linted.lint_rules(ruleset, profile, limits)
+
+      xaml = LintedXAML(
+        None, linted.xamlpath, linted._results, linted.ss_activities, linted.invokes
+      )
+    else:
+      if not os.path.isfile(xamlpath):
+        raise ValueError('Given XAML file path is not found or not a file.')
+
+      xaml = LintedXAML(None, xamlpath, [], [])
+      parsed = None  # Parsed while walking through it
+      walk = ProfiledWalk(xaml, ruleset) if profile else Walk(xaml, ruleset)
+      walk.limits = limits
+      walk.run(
+        etree.iterparse(xamlpath, events=('start', 'end'), **PARSER_OPTIONS),
+        prune=True
+      )
+      xaml.collect(walk)
+  except (LintAborted, MemoryError) as e:
+    linted = walk = None  # Release the tree
+
+    if isinstance(e, MemoryError):
+      e = LintAborted('%s (Memory limit: %s MiB)', budget.memory if budget else None)
+
+    results = [e.finding] if 'lint-aborted' in ruleset else []
+    xaml = LintedXAML(None, xamlpath, results, [])
+    xaml.screenshots, xaml.invokes = scan_xaml(xamlpath)
+    xaml.aborted = True
+
+    if profile:
+      ended = clock()
+      xaml.stats = {
+        'wall': ended[0] - started[0],
+        'cpu': ended[1] - started[1],
+        'parse': 0.0,
+        'nodes': 0,
+        'rules': {},
+      }
+  else:
+    if profile:
+      xaml.stats = walk.stats(started, parsed)
+
+  if selector_cache.added is not None:
+    xaml.selectors = selector_cache.drain()
+
+  return xaml
+
+
+# Raised when linting a XAML file exceeds its budget (see Limits)
+class LintAborted(Exception):
+  def __init__(self, form: str, limit) -> None:
+    super().__init__(form % ('lint-aborted', limit))
+    self.finding = Finding('lint-aborted', MessageCategory.ERROR, form, (limit,))
+
+
+# Limits of time and memory to lint a XAML file by its budget (see Walk.run)
+class Limits:
+  def __init__(self, budget: Budget, started: float) -> None:
+    self.budget = budget
+
+    # Deadline (in time.perf_counter) and RSS in MiB (None means unlimited)
+    self.deadline = started + budget.time if budget.time is not None else None
+    self.rss = None
+
+    if budget.memory is not None:
+      rss = current_rss()
+      self.rss = rss + budget.memory if rss is not None else None
+
+  # Raise LintAborted if the limit is exceeded
+  def check(self) -> None:
+    if self.deadline is not None and time.perf_counter() > self.deadline:
+      raise LintAborted('%s (Time limit: %ss)', self.budget.time)
+
+    if self.rss is not None and current_rss() > self.rss:
+      raise LintAborted('%s (Memory limit: %s MiB)', self.budget.memory)
+
+
+# Get the current RSS (in MiB) of this process (None if it is not available)
+# It is available only on Linux, so the memory budget is not applied on other platforms.
+def current_rss() -> float:
+  try:
+    with open('/proc/self/statm', 'rb') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+  except (OSError, ValueError, AttributeError):
+    return None
+
+
+# Get wall-clock time and CPU time of this process
+def clock() -> tuple:
+  return time.perf_counter(), time.process_time()
+
+
+# Get peak RSS (in MiB) of this process and its worker processes (None if it is not available)
+def peak_rss() -> dict:
+  try:
+    import resource  # Not available on Windows
+  except ImportError:
+    return None
+
+  unit = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is in bytes on macOS
+
+  return {
+    'main': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+    'workers': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit,
+  }
+
+
+# A context manager which does nothing (used when statistics are not recorded)
+nophase = suppress()
+
+
+# Performance statistics of lint (see --stats and --profile)
+# Phases are measured in the main process. XAML files and rules are measured in the process
+# which lints them (see ProfiledWalk.stats), so their time is summed up over worker processes.
+class Stats:
+  def __init__(self) -> None:
+    self.started = clock()
+    self.phases = OrderedDict()  # {name of the phase: [wall time, CPU time]}
+    self.rules = {}  # {name of the rule: [wall time, CPU time, number of calls]}
+    self.files = []  # [(path to XAML file, statistics of the file)]
+    self.aborted = []  # XAML files whose lint was aborted by the budget
+
+  # Measure time of the phase (time of phases with the same name is summed up)
+  @contextmanager
+  def phase(self, name: str):
+    started = clock()
+
+    try:
+      yield
+    finally:
+      ended = clock()
+      timing = self.phases.setdefault(name, [0.0, 0.0])
+      timing[0] += ended[0] - started[0]
+      timing[1] += ended[1] - started[1]
+
+  # Add statistics of the linted XAML file
+  def add(self, xaml: LintedXAML) -> None:
+    self.files.append((xaml.xamlpath, xaml.stats))
+
+    if xaml.aborted:
+      self.aborted.append(xaml.xamlpath)
+
+    for name, timing in xaml.stats['rules'].items():
+      total = self.rules.setdefault(name, [0.0, 0.0, 0])
+      total[0] += timing[0]
+      total[1] += timing[1]
+      total[2] += timing[2]
+
+  # Get the report as a dict (to be dumped in JSON)
+  def report(self) -> dict:
+    ended = clock()
+    lint = self.phases.get('lint', [0.0])[0]
+
+    return {
+      'wall': ended[0] - self.started[0],
+      'cpu': ended[1] - self.started[1],
+      'files': len(self.files),
+      'nodes': sum(map(lambda f: f[1]['nodes'], self.files)),
+      'files_per_second': len(self.files) / lint if lint > 0 else None,
+      'peak_rss': peak_rss(),
+      'selector_cache': {'hits': selector_cache.hits, 'misses': selector_cache.misses},
+      'phases': OrderedDict(
+        (name, {'wall': t[0], 'cpu': t[1]}) for name, t in self.phases.items()
+      ),
+      'parse': sum(map(lambda f: f[1]['parse'], self.files)),
+      'aborted': self.aborted,
+      'rules': OrderedDict(
+        (name, {'wall': t[0], 'cpu': t[1], 'calls': t[2]})
+        for name, t in sorted(self.rules.items(), key=lambda r: r[1][0], reverse=True)
+      ),
+      'per_file': [
+        OrderedDict([
+          ('file', path),
+          ('wall', f['wall']),
+          ('cpu', f['cpu']),
+          ('parse', f['parse']),
+          ('nodes', f['nodes']),
+        ])
+        for path, f in self.files
+      ],
+    }
+
+  # Get a table of the slowest XAML files and rules (top is the number of rows for each)
+  def table(self, top: int) -> str:
+    report = self.report()
+    lines = ['%-60s %9s %9s' % ('Phase', 'Wall', 'CPU')]
+    lines += [
+      '%-60s %8.3fs %8.3fs' % (name, t['wall'], t['cpu']) for name, t in report['phases'].items()
+    ]
+
+    lines += ['', '%-60s %9s %9s %9s' % ('Rule', 'Wall', 'CPU', 'Calls')]
+    lines += [
+      '%-60s %8.3fs %8.3fs %9d' % (name, t['wall'], t['cpu'], t['calls'])
+      for name, t in list(report['rules'].items())[:top]
+    ]
+
+    lines += ['', '%-60s %9s %9s %9s' % ('File', 'Wall', 'Parse', 'Nodes')]
+    lines += [
+      '%-60s %8.3fs %8.3fs %9d' % (f['file'][-60:], f['wall'], f['parse'], f['nodes'])
+      for f in sorted(report['per_file'], key=lambda f: f['wall'], reverse=True)[:top]
+    ]
+
+    lines += ['', 'Files: %d (%s files/s), Nodes: %d, Time: %.3fs (CPU: %.3fs)' % (
+      report['files'],
+      '-' if report['files_per_second'] is None else '%.1f' % report['files_per_second'],
+      report['nodes'],
+      report['wall'],
+      report['cpu']
+    )]
+
+    if report['peak_rss'] is not None:
+      lines.append('Peak RSS: %.1f MiB (Workers: %.1f MiB)' % (
+        report['peak_rss']['main'], report['peak_rss']['workers']
+      ))
+
+    return '\n'.join(lines)
+
+
+# Name of the file which lists files to be ignored in the project directory
+IGNORE_FILE = '.uilintignore'
+
+# Directories whose XAML files are never linted (they are only scanned, see find_files)
+# Hidden directories are not searched at all.
+PRUNED_DIRS = frozenset(('__pycache__', 'bin', 'node_modules', 'obj'))
+
+
+# Load patterns of files to be ignored (like .gitignore, but "!" and "**" are not supported)
+# A pattern with "/" is matched with the path relative to the project directory,
+# otherwise it is matched with the name of a file or a directory.
+# A pattern ends with "/" is matched with directories only.
+def load_ignore(path: str) -> list:
+  try:
+    with open(path, encoding='utf-8') as f:
+      lines = f.read().splitlines()
+  except FileNotFoundError:
+    return []
+
+  patterns = []
+
+  for line in map(str.strip, lines):
+    if not line or line[:1] == '#':
+      continue
+
+    dironly = line[-1:] == '/'
+    line = line.rstrip('/')
+    patterns.append((line.lstrip('/'), '/' in line, dironly))
+
+  return patterns
+
+
+# Check the path (relative to the project directory, separated by "/") is ignored or not
+def is_ignored(relpath: str, isdir: bool, ignore: list) -> bool:
+  name = relpath[relpath.rfind('/') + 1:]
+
+  for pattern, anchored, dironly in ignore:
+    if dironly and not isdir:
+      continue
+    if fnmatch(relpath if anchored else name, pattern):
+      return True
+
+  return False
+
+
+# Find XAML files in the project directory and screenshot files in its .screenshots directory
+# in a single pass. Hidden directories are not searched.
+# XAML files are returned in a stable order (files in a directory precede its sub-directories and
+# they are sorted by name) as a tuple of (XAML files, names of screenshot files, excluded XAML
+# files). Excluded XAML files are ignored by patterns or in PRUNED_DIRS, and they are not linted
+# but may still refer to screenshots and workflows (see Project.excluded_xamls).
+def find_files(projectdir: str, ignore: list = ()) -> tuple:
+  xamlfiles = []
+  screenshots = []
+  excluded = []
+  stack = [('', projectdir, False)]
+
+  while stack:
+    reldir, path, isexcluded = stack.pop()
+    subdirs = []
+
+    try:
+      entries = sorted(os.scandir(path), key=lambda e: e.name)
+    except OSError:
+      continue
+
+    for entry in entries:
+      relpath = reldir + entry.name
+
+      if entry.is_dir():
+        if reldir == '' and entry.name == '.screenshots':
+          screenshots = list(map(lambda e: e.name, os.scandir(entry.path)))
+        elif entry.name[:1] != '.':
+          subdirs.append((relpath + '/', entry.path, isexcluded or (
+            entry.name in PRUNED_DIRS or is_ignored(relpath, True, ignore)
+          )))
+      elif entry.name[:1] != '.' and os.path.normcase(entry.name)[-5:] == '.xaml':
+        if isexcluded or is_ignored(relpath, False, ignore):
+          excluded.append(entry.path)
+        else:
+          xamlfiles.append(entry.path)
+
+    stack.extend(reversed(subdirs))
+
+  return xamlfiles, screenshots, excluded
+
+
+# Yield whenever files in the project directories may be changed (it never ends)
+# Changes are notified by watchdog (inotify, FSEvents, etc.) if it is installed, otherwise
+# it yields every interval seconds. Actual changes are found by Project.update.
+def watch(projectdirs: list, interval: float = 0.5):
+  if Observer is None:
+    while True:
+      time.sleep(interval)
+      yield
+
+  changed = threading.Event()
+  handler = FileSystemEventHandler()
+  handler.on_any_event = lambda event: changed.set()
+
+  observer = Observer()
+  for projectdir in projectdirs:
+    observer.schedule(handler, projectdir, recursive=True)
+  observer.start()
+
+  try:
+    while True:
+      changed.wait()
+      time.sleep(0.02)  # Wait for a burst of events by saving a file
+      changed.clear()
+      yield
+  finally:
+    observer.stop()
+    observer.join()
+
+
+# Find project directories (which contain project.json) under the directory in a stable order
+# Hidden directories, PRUNED_DIRS and sub-directories of projects are not searched.
+def find_projects(rootdir: str) -> list:
+  projects = []
+  stack = [rootdir]
+
+  while stack:
+    path = stack.pop()
+
+    if os.path.isfile(os.path.join(path, 'project.json')):
+      projects.append(path)
+      continue
+
+    try:
+      entries = sorted(os.scandir(path), key=lambda e: e.name, reverse=True)
+    except OSError:
+      continue
+
+    stack.extend(
+      entry.path for entry in entries
+      if entry.is_dir() and entry.name[:1] != '.' and entry.name not in PRUNED_DIRS
+    )
+
+  return projects
+
+
+# Split XAML files of the project into shards balanced by file size (see Project.shard)
+# Files are assigned from the largest one to the shard with the least total size. Ties are
+# broken by paths relative to the project directory, so every shard gets the same partition.
+def shard_files(projectdir: str, xamlfiles: list, index: int, count: int) -> list:
+  totals = [0] * count
+  assigned = set()
+  files = sorted(
+    map(
+      lambda f: (os.path.getsize(f) + 1, os.path.relpath(f, projectdir).replace(os.sep, '/'), f),
+      xamlfiles
+    ),
+    key=lambda f: (-f[0], f[1])
+  )
+
+  for size, relpath, xamlpath in files:
+    shard = totals.index(min(totals))
+    totals[shard] += size
+
+    if shard == index:
+      assigned.add(xamlpath)
+
+  return list(filter(lambda f: f in assigned, xamlfiles))
+
+
+# Merge partial results of shards (see Project.partial)
+# Returns a list of (project directory, a list of Result, in-use screenshots) for each project.
+# Results are in the same order as linting the project at once. Results of shards are already
+# filtered by the baseline, so it is used only for results of the graph of workflow invocations.
+def merge_partials(partials: list, baseline: 'Baseline' = None) -> list:
+  projects = OrderedDict()
+
+  for partial in partials:
+    for p in partial['projects']:
+      merged = projects.setdefault(p['projectdir'], {
+        'shards': set(), 'results': [], 'inuse': set(), 'invokes': [], 'excluded': OrderedDict(),
+        'rules': ()
+      })
+
+      merged['shards'].add(tuple(p['shard']))
+      merged['results'].extend(p['results'])
+      merged['inuse'].update(p['inuse_screenshots'])
+      merged['invokes'].extend(p.get('invokes', ()))
+      merged['excluded'].update(p.get('excluded', ()))  # The same in every shard
+      merged['rules'] = p.get('graph_rules', ())
+
+  results = []
+
+  for projectdir, merged in projects.items():
+    counts = set(map(lambda s: s[1], merged['shards']))
+    if len(counts) != 1 or len(merged['shards']) != next(iter(counts)):
+      raise ValueError('Shards of %s are missing or inconsistent.' % projectdir)
+
+    # Results of the project itself are reported by every shard
+    project_results = []
+    for result in filter(lambda r: r[0] < 0, merged['results']):
+      if result not in project_results:
+        project_results.append(result)
+
+    xaml_results = sorted(filter(lambda r: r[0] >= 0, merged['results']), key=lambda r: r[0])
+
+    # The graph of workflow invocations is checked with invoked workflows of all shards
+    # (excluded XAML files are in the graph but their findings are not reported)
+    invokes = sorted(merged['invokes'], key=lambda i: i[0])
+    invokes += [[-1, path, invoked] for path, invoked in merged['excluded'].items()]
+    graph = check_invokes(
+      projectdir,
+      list(map(lambda i: i[1], invokes)),
+      dict(map(lambda i: (i[1], list(map(tuple, i[2]))), invokes)),
+      set(merged['rules']),
+      set(map(lambda i: os.path.realpath(i[1]), filter(lambda i: i[0] >= 0, invokes)))
+    )
+
+    if baseline is not None:
+      graph = list(baseline.filter(graph))
+
+    graph_results = list(map(lambda g: as_result(*g), graph))
+
+    results.append((
+      projectdir,
+      list(chain(
+        map(
+          lambda r: Result(r[1], MessageCategory[r[2]], r[3], *r[4:5]),
+          project_results + xaml_results
+        ),
+        graph_results
+      )),
+      merged['inuse']
+    ))
+
+  return results
+
+
+# Patterns of InformativeScreenshot attributes, tags of InvokeWorkflowFile and CommentOut (and
+# comments), and attributes in tags (see scan_xaml)
+RE_SCREENSHOT_ATTR = re.compile(rb'''\sInformativeScreenshot\s*=\s*["']([^"']*)["']''')
+RE_INVOKE_TAG = re.compile(
+  rb'<!--.*?-->|<(/?)(?:\w+:)?(InvokeWorkflowFile|CommentOut)(?=[\s/>])([^>]*)>', re.DOTALL
+)
+RE_XML_ATTR = re.compile(rb'''([\w:.]+)\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+
+
+# Get in-use screenshots and invoked workflows (see LintedXAML.invokes) in the XAML file by a
+# simple scan of the text (without parsing)
+# Invocations in ui:CommentOut (and comments) are ignored as invoked_workflows does, and names of
+# their arguments are not taken.
+# Attribute values are unescaped as the parser does (entities of XML are a subset of HTML ones).
+def scan_xaml(xamlpath: str) -> tuple:
+  with open(xamlpath, 'rb') as f:
+    text = f.read()
+
+  screenshots = set(map(
+    lambda m: html.unescape(m.decode('utf-8')), RE_SCREENSHOT_ATTR.findall(text)
+  ))
+  invokes = []
+  commentout = 0  # Depth of ui:CommentOut
+
+  for closing, name, tag in RE_INVOKE_TAG.findall(text):
+    if name == b'CommentOut':
+      if closing:
+        commentout -= 1
+      elif tag[-1:] != b'/':
+        commentout += 1
+
+      continue
+
+    if not name or closing or commentout > 0:
+      continue  # A comment, a closing tag or an invocation in ui:CommentOut
+
+    attrs = dict(map(
+      lambda m: (m[0].decode('utf-8'), html.unescape((m[1] or m[2]).decode('utf-8'))),
+      RE_XML_ATTR.findall(tag)
+    ))
+
+    if 'WorkflowFileName' in attrs:
+      invokes.append((
+        attrs['WorkflowFileName'], attrs.get('DisplayName') or 'InvokeWorkflowFile', ()
+      ))
+
+  return screenshots, invokes
+
+
+# Normalize a path of a workflow relative to the project directory with "/" separators
+# None is returned for paths which cannot be resolved statically (e.g. VB expressions).
+def workflow_path(path: str) -> str:
+  path = path.strip().replace('\\', '/')
+
+  if not path or path[:1] in ('[', '/') or ':' in path:
+    return None
+
+  path = posixpath.normpath(path)
+  return None if path == '..' or path.startswith('../') else path
+
+
+# Get entry points of the project from project.json (a list of paths, see workflow_path)
+# None is returned if they are unknown (e.g. project.json is missing) or the project is a
+# library (its workflows are invoked from other projects).
+def project_entry_points(projectdir: str) -> list:
+  try:
+    with open(os.path.join(projectdir, 'project.json'), encoding='utf-8-sig') as f:
+      project = json.load(f)
+  except (OSError, ValueError):
+    return None
+
+  if not isinstance(project, dict):
+    return None
+
+  design = project.get('designOptions') or {}
+  if design.get('outputType') == 'Library':
+    return None
+
+  files = [project.get('main') or 'Main.xaml']
+  files += [e.get('filePath') for e in project.get('entryPoints') or () if isinstance(e, dict)]
+  files += [
+    e.get('fileName') for e in design.get('fileInfoCollection') or () if isinstance(e, dict)
+  ]
+
+  return list(filter(None, map(workflow_path, filter(lambda f: isinstance(f, str), files))))
+
+
+# Graph of workflow invocations in the project
+# Nodes are XAML files (indexes of xamlfiles) and edges are kept in a compact adjacency list
+# (a tuple of invoked nodes for each node) merged from invoked workflows of each XAML file, so
+# the graph is built without parsing XAML files again (e.g. in worker processes or the cache).
+# Paths are case-insensitive as UiPath runs on Windows.
+class InvokeGraph:
+  def __init__(self, projectdir: str, xamlfiles: list, invokes: dict) -> None:
+    # Paths of nodes relative to the project directory with "/" separators
+    # (workflow_path is only for WorkflowFileName, e.g. it drops "[Draft] Main.xaml")
+    self.names = list(map(lambda f: os.path.relpath(f, projectdir).replace(os.sep, '/'), xamlfiles))
+
+    # Nodes by lower-cased paths
+    self.nodes = {}
+    for node, name in enumerate(self.names):
+      self.nodes.setdefault(name.lower(), node)
+
+    # Invoked nodes of each node
+    self.edges = []
+
+    # Invocations of missing workflows as a list of (node, WorkflowFileName, DisplayName)
+    self.missing = []
+
+    for node, xamlpath in enumerate(xamlfiles):
+      targets = []
+
+      for target, activity, arguments in invokes.get(xamlpath, ()):
+        path = workflow_path(target)
+        if path is None:
+          continue  # Dynamic paths are not in the graph
+
+        invoked = self.nodes.get(path.lower())
+        if invoked is None:
+          # It may be excluded by .uilintignore
+          if not os.path.isfile(os.path.join(projectdir, *path.split('/'))):
+            self.missing.append((node, target, activity))
+        elif invoked not in targets:
+          targets.append(invoked)
+
+      self.edges.append(tuple(targets))
+
+  # Get nodes reachable from the paths (including nodes of the paths)
+  def reachable(self, paths: list) -> set:
+    stack = [self.nodes[p.lower()] for p in paths if p.lower() in self.nodes]
+    seen = set(stack)
+
+    while stack:
+      for invoked in self.edges[stack.pop()]:
+        if invoked not in seen:
+          seen.add(invoked)
+          stack.append(invoked)
+
+    return seen
+
+  # Get cycles of invocations as a list of sorted nodes in each cycle
+  # Cycles are strongly connected components found by Tarjan's algorithm (without recursion
+  # for deep invocations), and a node which invokes itself is also a cycle.
+  def cycles(self) -> list:
+    index = [-1] * len(self.edges)
+    lowlink = [0] * len(self.edges)
+    stack = []
+    onstack = set()
+    cycles = []
+    count = 0
+
+    for root in range(len(self.edges)):
+      if index[root] >= 0:
+        continue
+
+      work = [(root, 0)]  # (node, index of the next edge)
+
+      while work:
+        node, next_edge = work.pop()
+
+        if next_edge == 0:
+          index[node] = lowlink[node] = count
+          count += 1
+          stack.append(node)
+          onstack.add(node)
+
+        edges = self.edges[node]
+        for i in range(next_edge, len(edges)):
+          invoked = edges[i]
+
+          if index[invoked] < 0:
+            work.append((node, i + 1))
+            work.append((invoked, 0))
+            break
+          elif invoked in onstack:
+            lowlink[node] = min(lowlink[node], index[invoked])
+        else:
+          if lowlink[node] == index[node]:
+            component = []
+
+            while True:
+              member = stack.pop()
+              onstack.discard(member)
+              component.append(member)
+
+              if member == node:
+                break
+
+            if len(component) > 1 or node in edges:
+              cycles.append(sorted(component))
+
+          if work:
+            parent = work[-1][0]
+            lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    return sorted(cycles)
+
+
+# Check the graph of workflow invocations (see InvokeGraph) and return findings as a list of
+# (path of the XAML file, Finding) in order of xamlfiles
+# invokes: {path of the XAML file: invoked workflows (see LintedXAML.invokes)}
+# reported: Real paths of XAML files to be reported (None means all XAML files)
+def check_invokes(
+  projectdir: str, xamlfiles: list, invokes: dict, ruleset: 'RuleSet', reported: set = None
+) -> list:
+  if not any(map(lambda r: r in ruleset, INVOKE_RULES)):
+    return []
+
+  graph = InvokeGraph(projectdir, xamlfiles, invokes)
+  findings = []
+
+  def report(node: int) -> bool:
+    return reported is None or os.path.realpath(xamlfiles[node]) in reported
+
+  if 'missing-workflow' in ruleset:
+    for node, target, activity in graph.missing:
+      findings.append((node, Finding(
+        'missing-workflow',
+        MessageCategory.ERROR,
+        '%s (Activity: %s, Workflow: %s)',
+        (activity, target)
+      )))
+
+  # Unreachable workflows are unknown if no entry points are found in the project
+  entries = project_entry_points(projectdir) if 'unreachable-workflow' in ruleset else None
+  if entries is not None and any(map(lambda p: p.lower() in graph.nodes, entries)):
+    reachable = graph.reachable(entries)
+
+    for node in range(len(xamlfiles)):
+      if node not in reachable:
+        findings.append((node, Finding(
+          'unreachable-workflow', MessageCategory.WARNING, '%s', ()
+        )))
+
+  # A cycle is reported once for its first XAML file to be reported
+  if 'recursive-workflow' in ruleset:
+    for cycle in graph.cycles():
+      node = next(filter(report, cycle), None)
+
+      if node is not None:
+        findings.append((node, Finding(
+          'recursive-workflow',
+          MessageCategory.WARNING,
+          '%s (Workflows: %s)',
+          (', '.join(map(lambda n: graph.names[n], cycle)),)
+        )))
+
+  findings.sort(key=lambda f: f[0])  # Stable for findings of the same file
+  return [(xamlfiles[node], finding) for node, finding in findings if report(node)]
+
+
+# Get paths of XAML files changed since the ref by git
+# Changes are taken from the merge base of the ref and HEAD (i.e. changes in a pull request)
+# including uncommitted and untracked files. Deleted files are excluded.
+def git_changed_files(projectdir: str, ref: str) -> list:
+  def git(*args) -> str:
+    return subprocess.run(
+      ('git',) + args,
+      cwd=projectdir,
+      stdout=subprocess.PIPE,
+      stderr=subprocess.PIPE,
+      check=True
+    ).stdout.decode('utf-8')
+
+  base = git('merge-base', ref, 'HEAD').strip()
+  changed = git('diff', '--name-only', '-z', '--relative', '--diff-filter=d', base, '--')
+  untracked = git('ls-files', '-z', '--others', '--exclude-standard')
+
+  return [
+    os.path.join(projectdir, path)
+    for path in (changed + untracked).split('\0')
+    if os.path.normcase(path)[-5:] == '.xaml'
+  ]
+
+
+# Get the default directory for the lint cache
+def default_cachedir() -> str:
+  if os.name == 'nt' and 'LOCALAPPDATA' in os.environ:
+    basedir = os.environ['LOCALAPPDATA']
+  else:
+    basedir = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+
+  return os.path.join(basedir, 'uilint')
+
+
+# Get the path to a file for the project in the cache directory (e.g. suffix is ".pickle")
+# Files are named by a digest of the absolute path to the project directory.
+def cache_path(cachedir: str, projectdir: str, suffix: str) -> str:
+  name = hashlib.sha1(os.path.abspath(projectdir).encode('utf-8')).hexdigest()
+  return os.path.join(cachedir, name + suffix)
+
+
+# Load a pickled object from the file (default is returned if it is missing or broken)
+def load_pickle(path: str, default=None):
+  try:
+    with open(path, 'rb') as f:
+      return pickle.load(f)
+  except (OSError, EOFError, ValueError, TypeError, AttributeError, pickle.UnpicklingError):
+    return default
+
+
+# Open a temporary file to write the file atomically (binary or UTF-8 text by mode)
+# The temporary file replaces the file only when it is written successfully, so other runs never
+# read a partially written file. The directory of the file is created if it does not exist.
+@contextmanager
+def atomic_open(path: str, mode: str = 'wb'):
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  tmppath = '%s.%d.tmp' % (path, os.getpid())
+
+  try:
+    with open(tmppath, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+      yield f
+
+    os.replace(tmppath, path)
+  except BaseException:
+    with suppress(OSError):
+      os.remove(tmppath)
+
+    raise
+
+
+# Get a fingerprint of the rules
+# Results are cached per uilint version, language of messages, enabled rules and their source code.
+def rules_fingerprint(ruleset: 'RuleSet') -> str:
+  digest = hashlib.sha256(('%s\0%s\0' % (__version__, language)).encode('utf-8'))
+  digest.update(('%s\0' % ','.join(sorted(ruleset.ids))).encode('utf-8'))
+  sources = {uixaml.__file__}
+
+  for r in ruleset.rules:
+    digest.update(('%s\0' % r.function.__qualname__).encode('utf-8'))
+    sources.add(sys.modules[r.function.__module__].__file__)
+
+  for source in sorted(sources):
+    with open(source, 'rb') as f:
+      digest.update(f.read())
+
+  return digest.hexdigest()
+
+
+# On-disk cache of lint results for each XAML file (see Project.lint)
+# Results are keyed by a digest of the XAML file and stored with the rules fingerprint.
+# Modification time and size of the file are used to skip hashing unchanged files.
+# Screenshots are not checked here as they depend on screenshots stored in the project.
+class Cache:
+  # Upper limit of the cache size (estimated by the pickled size of results)
+  max_size = 32 * 1024 * 1024
+
+  def __init__(self, project: Project) -> None:
+    self.project = project
+
+    # Path to the cache file for the project
+    self.path = cache_path(project.cachedir, project.projectdir, '.pickle')
+
+    # Time of this run (entries used in the run are kept in eviction)
+    self.now = time.time()
+
+    # Cached files: {path: (mtime, size, digest)}
+    self.files = {}
+
+    # Cached results: {digest: [results, screenshots, size, last used time, invoked workflows]}
+    self.entries = {}
+
+    # Digests of the files examined in this run
+    self.digests = {}
+
+    # XAML files whose lint was aborted by the budget (they are linted first in the next run)
+    self.aborted = set()
+
+    self.fingerprint = rules_fingerprint(project.ruleset)
+
+    # Start with an empty cache if it is missing or broken
+    cached = load_pickle(self.path)
+
+    if isinstance(cached, tuple) and len(cached) == 5:
+      fingerprint, files, entries, selectors, aborted = cached
+      self.aborted = aborted  # Aborted files do not depend on rules
+
+      if fingerprint == self.fingerprint:
+        self.files = files
+        self.entries = entries
+        selector_cache.update(selectors)  # Selector verdicts are shared with this run
+
+  # Get a digest of the XAML file (or the cached one if it seems unchanged)
+  def digest(self, xamlpath: str) -> str:
+    st = os.stat(xamlpath)
+    cached = self.files.get(xamlpath)
+
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+      digest = cached[2]
+    else:
+      with open(xamlpath, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+
+      self.files[xamlpath] = (st.st_mtime_ns, st.st_size, digest)
+
+    self.digests[xamlpath] = digest
+    return digest
+
+  # Get cached (results, screenshots, invoked workflows) for the XAML file (None if not cached)
+  def get(self, xamlpath: str) -> tuple:
+    entry = self.entries.get(self.digest(xamlpath))
+
+    if entry is None:
+      return None
+
+    entry[3] = self.now
+    return (
+      list(map(
+        lambda r: ResultXAML(MessageCategory[r[0]], r[1]) if len(r) == 2
+        else Finding(r[0], MessageCategory[r[1]], r[2], r[3]),
+        entry[0]
+      )),
+      list(entry[1]),
+      list(entry[4])
+    )
+
+  # Store results, screenshots and invoked workflows of the XAML file
+  def put(self, xamlpath: str, results: list, screenshots: list, invokes: list) -> None:
+    digest = self.digests.get(xamlpath) or self.digest(xamlpath)
+
+    # Results are stored in plain tuples to be independent from the module name (e.g. __main__)
+    results = list(map(
+      lambda r: (r.category.name, r.message) if isinstance(r, ResultXAML)
+      else (r.rule, r.category.name, r.form, r.params),
+      results
+    ))
+    screenshots = list(screenshots)
+    invokes = list(invokes)
+    size = len(pickle.dumps((results, screenshots, invokes), pickle.HIGHEST_PROTOCOL))
+
+    self.entries[digest] = [results, screenshots, size, self.now, invokes]
+    self.aborted.discard(xamlpath)
+
+  # Record the XAML file whose lint was aborted (results of aborted files are not stored)
+  def abort(self, xamlpath: str) -> None:
+    self.aborted.add(xamlpath)
+
+  # Save the cache to the file (least recently used entries are evicted to fit in max_size)
+  def save(self) -> None:
+    self.files = {path: self.files[path] for path in self.digests}
+
+    total = 0
+    entries = {}
+
+    for digest, entry in sorted(self.entries.items(), key=lambda e: e[1][3], reverse=True):
+      total += entry[2]
+
+      if total > self.max_size:
+        break
+
+      entries[digest] = entry
+
+    self.entries = entries
+
+    try:
+      with atomic_open(self.path) as f:
+        pickle.dump(
+          (
+            self.fingerprint,
+            self.files,
+            self.entries,
+            dict(selector_cache.entries),
+            set(filter(os.path.isfile, self.aborted))
+          ),
+          f,
+          pickle.HIGHEST_PROTOCOL
+        )
+    except OSError:
+      pass  # The cache is just an optimization
+
+
+# Index of screenshot files in the project: {name: (mtime, size, digest of the content)}
+# Files are hashed in parallel threads with memory-mapped reads (hashlib releases the GIL), and
+# modification time and size are used to skip hashing unchanged files as in Cache.
+class ScreenshotIndex:
+  def __init__(self, project: Project) -> None:
+    self.project = project
+
+    # Path to the index file for the project (None means the index is not saved)
+    self.path = None
+    if project.cachedir is not None:
+      self.path = cache_path(project.cachedir, project.projectdir, '.screenshots.pickle')
+
+    # Start with an empty index if it is missing or broken
+    self.files = {}
+    if self.path is not None:
+      self.files = load_pickle(self.path, {})
+
+    # Number of files hashed in the last update()
+    self.hashed = 0
+
+  # Update the index for screenshot files (names in ssdir) and save it
+  def update(self, names: list) -> None:
+    stats = {}
+    for name in names:
+      try:
+        st = os.stat(os.path.join(self.project.ssdir, name))
+      except OSError:
+        continue  # Removed after it was found
+
+      stats[name] = (st.st_mtime_ns, st.st_size)
+
+    changed = list(filter(lambda n: self.files.get(n, ())[:2] != stats[n], stats))
+
+    with thread_pool(self.project.jobs) as executor:
+      digests = executor.map(
+        lambda n: file_digest(os.path.join(self.project.ssdir, n)),
+        changed
+      )
+      files = {name: self.files[name] for name in stats if name in self.files}
+      for name, digest in zip(changed, digests):
+        files[name] = stats[name] + (digest,)
+
+    self.hashed = len(changed)
+
+    if files != self.files:
+      self.files = files
+      self.save()
+
+  # Get groups of screenshot files with the same content (a list of sorted names)
+  def duplicates(self) -> list:
+    groups = {}
+    for name, (mtime, size, digest) in self.files.items():
+      if digest is not None:
+        groups.setdefault(digest, []).append(name)
+
+    return sorted(sorted(names) for names in groups.values() if len(names) > 1)
+
+  # Save the index to the file
+  def save(self) -> None:
+    if self.path is None:
+      return
+
+    try:
+      with atomic_open(self.path) as f:
+        pickle.dump(self.files, f, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+      pass  # The index is just an optimization
+
+
+# Get a digest of the file content (None if it cannot be read)
+# The file is memory-mapped not to copy the whole content.
+def file_digest(path: str) -> str:
+  digest = hashlib.sha256()
+
+  try:
+    with open(path, 'rb') as f:
+      if os.fstat(f.fileno()).st_size > 0:  # Empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+          digest.update(m)
+  except (OSError, ValueError):
+    return None
+
+  return digest.hexdigest()
+
+
+# Baseline of known findings which are not reported (e.g. for legacy projects)
+# A finding is identified by a fingerprint of the rule, the file (relative to the directory of
+# the baseline file) and its parameters such as DisplayName of the activity, without line numbers
+# and messages, so it survives unrelated edits and --lang. Identical findings in a file (e.g.
+# MessageBox activities with the default DisplayName) share the same fingerprint, so fingerprints
+# are counted and each of them suppresses only as many findings as it is counted. They are
+# looked up in O(1) before messages of findings are formatted.
+class Baseline:
+  def __init__(self, path: str, fingerprints: Counter = None) -> None:
+    # Path to the baseline file
+    self.path = path
+    self.basedir = os.path.dirname(os.path.abspath(path))
+
+    # Number of findings for each fingerprint
+    self.fingerprints = fingerprints if fingerprints is not None else Counter()
+
+  # Load the baseline file (ValueError is raised if it is broken)
+  @classmethod
+  def load(cls, path: str) -> 'Baseline':
+    with open(path, encoding='utf-8') as f:
+      data = json.load(f)
+
+    if not isinstance(data, dict) or not isinstance(data.get('fingerprints'), list):
+      raise ValueError('%s is not a baseline file.' % path)
+
+    return cls(path, Counter(data['fingerprints']))
+
+  # Get the fingerprint of a result of the file (Finding, ResultXAML or Result)
+  # Results of the project (e.g. no-project-file) are identified by their rule IDs since their
+  # messages are translated, and only results without rule IDs (ResultXAML from plugins) are
+  # identified by their messages.
+  def fingerprint(self, path: str, result) -> str:
+    if isinstance(result, Finding):
+      key = [result.rule]
+      key.extend(map(str, result.params))
+    elif getattr(result, 'rule', None) is not None:
+      key = [result.rule]
+    else:
+      key = [result.category.name, result.message]
+
+    relpath = os.path.relpath(os.path.abspath(path), self.basedir)
+    key.insert(1, relpath.replace(os.sep, '/'))
+
+    return hashlib.sha1('\0'.join(key).encode('utf-8')).hexdigest()
+
+  # Add findings as (path, Result, Finding or ResultXAML) to the baseline (see Project.findings)
+  def add(self, findings) -> None:
+    self.fingerprints.update(map(lambda f: self.fingerprint(*f), findings))
+
+  # Filter out findings as (path, Result, Finding or ResultXAML) in the baseline
+  # Findings beyond the count of their fingerprint (i.e. new duplicates) are not filtered out.
+  def filter(self, findings):
+    suppressed = Counter()
+
+    for finding in findings:
+      fingerprint = self.fingerprint(*finding)
+
+      if suppressed[fingerprint] < self.fingerprints[fingerprint]:
+        suppressed[fingerprint] += 1
+      else:
+        yield finding
+
+  # Save the baseline to the file (fingerprints are sorted to keep diffs small)
+  # A fingerprint is repeated as many times as it is counted.
+  def save(self) -> None:
+    with atomic_open(self.path, 'w') as f:
+      json.dump(
+        {'version': __version__, 'fingerprints': sorted(self.fingerprints.elements())}, f, indent=0
+      )
+
+
+# Options to parse XAML files (see XAML_PARSER)
+# Processing instructions and blank texts are dropped as rules never refer to them, IDs (xml:id)
+# are not collected, and entities and network access are never needed for XAML. Comments are kept
+# because they split texts (e.g. of x:Reference, see looped_activity).
+PARSER_OPTIONS = {
+  'remove_pis': True,
+  'remove_blank_text': True,
+  'collect_ids': False,
+  'resolve_entities': False,
+  'no_network': True,
+}
+
+# Parser shared by all XAML files (it is used only by the main thread of each process)
+XAML_PARSER = etree.XMLParser(**PARSER_OPTIONS)
+
+
+# Parse the XAML file (source is the content of the file if it is already read)
+# Contents of ViewState (layout of the designer) are dropped after parsing to save memory and
+# walking through them. ViewState elements themselves are kept since rules count children.
+def parse_xaml(xamlpath: str, source: bytes = None) -> etree._ElementTree:
+  if source is None:
+    tree = etree.parse(xamlpath, XAML_PARSER)
+  else:
+    tree = etree.fromstring(source, XAML_PARSER, base_url=xamlpath).getroottree()
+
+  for viewstate in list(tree.iter(TAG_VIEWSTATE)):
+    del viewstate[:]
+
+  return tree
+
+
+# Read files in a background thread ahead of parsing them (see Project.lint_files)
+# Yields (path, content of the file) in order of paths, and reading the next files overlaps with
+# parsing and linting the current one (lxml releases the GIL while parsing). Contents of at most
+# `ahead` files are kept. The content is None if it cannot be read (parse_xaml reports the error).
+def read_ahead(paths: list, ahead: int = 2):
+  def read(path: str) -> bytes:
+    try:
+      with open(path, 'rb') as f:
+        return f.read()
+    except OSError:
+      return None
+
+  paths = iter(paths)
+
+  with thread_pool(1) as executor:
+    reading = deque(map(lambda p: (p, executor.submit(read, p)), islice(paths, ahead)))
+
+    while reading:
+      path, future = reading.popleft()
+      reading.extend(map(lambda p: (p, executor.submit(read, p)), islice(paths, 1)))
+      yield path, future.result()
+
+
+# Linter class for each XAML files
+class XAML(LintedXAML):
+  def __init__(self, project: Project, xamlpath: str, source: bytes = None):
+    # Path to XAML file
+    if not os.path.isfile(xamlpath):
+      raise ValueError('Given XAML file path is not found or not a file.')
+
+    super().__init__(project, xamlpath, [], [])
+
+    # Parsed XAML tree and its XPath Evaluator (see parse_xaml)
+    self.tree = parse_xaml(self.xamlpath, source)
+    self.xpath = etree.XPathEvaluator(self.tree, namespaces=uixaml.xamlns)
+
+  # Get all in-use screenshots (i.e. return self.screenshots)
+  def inuse_screenshots(self) -> set:
+    if not any(self.screenshots):
+      ss = set()
+      ss_elem = XPATH_SCREENSHOTS(self.tree)
+
+      for e in ss_elem:
+        ssfile = e.get('InformativeScreenshot')
+        ss.add(ssfile)
+
+      self.screenshots = ss
+
+    return self.screenshots
+
+  # Linter
+  def lint(self):
+    self.lint_rules()
+    self.check_screenshots()
+
+  # Evaluate rules (all rules are evaluated in a single walk over the tree, see Walk class)
+  # If profile is True, time of each rule is measured (see ProfiledWalk).
+  # If limits are given, LintAborted is raised when they are exceeded (see lint_xaml).
+  def lint_rules(
+    self, ruleset: 'RuleSet' = None, profile: bool = False, limits: Limits = None
+  ) -> 'Walk':
+    ruleset = ruleset if ruleset is not None else self.project.ruleset
+    walk = ProfiledWalk(self, ruleset) if profile else Walk(self, ruleset)
+    walk.limits = limits
+    walk.run(etree.iterwalk(self.tree, events=('start', 'end')))
+    self.collect(walk)
+
+    return walk
+
+
+# Record of a registered rule
+# name: Name of the rule function
+# ids: IDs of the rule reported by the function (e.g. "nested-if" for "rule:nested-if" message)
+# tags: Tags (in Clark notation) to call the function
+# namespaces: Namespaces to call the function for all tags in them
+# function: Rule function (see rule())
+Rule = namedtuple('Rule', ('name', 'ids', 'tags', 'namespaces', 'function'))
+
+# Registered rules (a list of Rule) in order of results
+rules = []
+
+# IDs of the rules for the graph of workflow invocations (see check_invokes)
+INVOKE_RULES = ('missing-workflow', 'unreachable-workflow', 'recursive-workflow')
+
+# IDs of the rules evaluated by Project and LintedXAML (not by rule functions)
+project_rules = ('no-project-file', 'no-screenshots', 'lint-aborted')
+
+# Names of plugin modules loaded by load_plugins()
+plugins = []
+
+
+# Decorator to register a rule function for given tags
+# A tag is specified with a prefix (e.g. ui:TypeInto) and "ui:*" matches all tags in the namespace.
+# The function is called as function(walk, element) and yields ResultXAML for the element.
+# (It may also return None if it only collects information from the element.)
+# ids are IDs of the rule to enable/disable it. If it is empty, the function is always called.
+def rule(*names: str, ids: tuple = ()):
+  def register(function):
+    rules.append(Rule(
+      function.__name__,
+      tuple(ids),
+      frozenset(uixaml.clark(n) for n in names if not n.endswith(':*')),
+      frozenset(uixaml.xamlns[n[:-2]] for n in names if n.endswith(':*')),
+      function
+    ))
+    select_rules.cache_clear()
+    return function
+
+  return register
+
+
+# Set of enabled rules
+# Disabled rules are excluded from the dispatch table, so they are never called while walking.
+class RuleSet:
+  def __init__(self, enable: tuple = None, disable: tuple = ()) -> None:
+    # IDs given to enable (None means all rules) and disable rules
+    self.enable = tuple(map(rule_id, enable)) if enable is not None else None
+    self.disable = tuple(map(rule_id, disable))
+
+    known = set(project_rules).union(*map(lambda r: r.ids, rules))
+    unknown = (set(self.enable or ()) | set(self.disable)) - known
+    if unknown:
+      raise ValueError('Unknown rule: %s' % ', '.join(sorted(unknown)))
+
+    # IDs of enabled rules
+    self.ids = (set(self.enable) if self.enable is not None else known) - set(self.disable)
+
+    # Enabled rules (a list of Rule) in order of results
+    self.rules = [r for r in rules if not r.ids or not self.ids.isdisjoint(r.ids)]
+
+    # Rule functions for each tag (cache of dispatch())
+    self.rules_by_tag = {}
+
+  # Check the rule is enabled or not (e.g. 'nested-if' in ruleset)
+  def __contains__(self, id: str) -> bool:
+    return id in self.ids
+
+  # Rules are re-selected from registered rules (it is sent to worker processes)
+  def __reduce__(self):
+    return (select_rules, (self.enable, self.disable))
+
+  # Get rule functions (with their index in self.rules) for the tag
+  def dispatch(self, tag: str) -> list:
+    try:
+      return self.rules_by_tag[tag]
+    except KeyError:
+      ns = tag[1:tag.find('}')] if tag[:1] == '{' else ''
+      handlers = [
+        (index, r.function)
+        for index, r in enumerate(self.rules)
+        if tag in r.tags or ns in r.namespaces
+      ]
+      self.rules_by_tag[tag] = handlers
+      return handlers
+
+
+# Get a RuleSet (the same RuleSet is shared for the same arguments)
+@lru_cache(maxsize=None)
+def select_rules(enable: tuple = None, disable: tuple = ()) -> RuleSet:
+  return RuleSet(enable, disable)
+
+
+# Normalize ID of a rule (e.g. "rule:nested-if" -> "nested-if")
+def rule_id(name: str) -> str:
+  name = name.strip()
+  return name[len('rule:'):] if name.startswith('rule:') else name
+
+
+# Check whether any installed distribution has entry points in "uilint.rules" group
+# entry_points.txt files are read directly because importing importlib.metadata takes longer than
+# linting a small XAML file (see load_plugins).
+def has_rule_entry_points() -> bool:
+  for path in sys.path:
+    try:
+      entries = list(os.scandir(path or '.'))
+    except OSError:
+      continue  # Not a directory (e.g. a zip file)
+
+    for entry in entries:
+      if entry.name.endswith(('.dist-info', '.egg-info')):
+        try:
+          with open(os.path.join(entry.path, 'entry_points.txt'), encoding='utf-8') as f:
+            if '[uilint.rules]' in f.read():
+              return True
+        except (OSError, ValueError):
+          pass
+
+  return False
+
+
+# Load rule plugins
+# A plugin is a module which has register(uilint) function to register rules by uilint.rule.
+# Entry points in "uilint.rules" group are also loaded (they refer to register functions).
+# uilint is this module (note that it is __main__ if uilint.py is run as a script).
+def load_plugins(modules: list = ()) -> None:
+  uilint = sys.modules[__name__]
+
+  if 'uilint.rules' not in plugins:
+    plugins.append('uilint.rules')
+
+    # importlib.metadata is slow to import, so it is used only if some distribution has them
+    entry_points = None
+
+    if has_rule_entry_points():
+      try:
+        from importlib.metadata import entry_points  # Python >= 3.8
+      except ImportError:
+        pass
+
+    if entry_points is not None:
+      eps = entry_points()
+
+      if hasattr(eps, 'select'):
+        eps = eps.select(group='uilint.rules')  # Python >= 3.10
+      else:
+        eps = eps.get('uilint.rules', ())
+
+      for ep in eps:
+        ep.load()(uilint)
+
+  for module in modules:
+    if module not in plugins:
+      plugins.append(module)
+      importlib.import_module(module).register(uilint)
+
+
+# Load a configuration file for rules (JSON)
+# {"enable": [IDs of rules], "disable": [IDs of rules], "plugins": [Names of plugin modules]}
+def load_config(path: str) -> dict:
+  with open(path, encoding='utf-8') as f:
+    config = json.load(f)
+
+  if not isinstance(config, dict):
+    raise ValueError('Configuration file should contain a JSON object.')
+
+  return config
+
+
+# Select rules for the project by the configuration and options
+# config is in the format of uilint.json (None means uilint.json in the project directory),
+# enable replaces "enable" of the configuration and disable is added to "disable" of it.
+# Projects with the same configuration share the same RuleSet.
+def project_ruleset(
+  projectdir: str, config: dict = None, enable: list = None, disable: list = ()
+) -> RuleSet:
+  if config is None:
+    config = {}
+    if os.path.isfile(os.path.join(projectdir, 'uilint.json')):
+      config = load_config(os.path.join(projectdir, 'uilint.json'))
+
+  load_plugins(config.get('plugins', []))
+
+  if enable is None:
+    enable = config.get('enable')
+
+  return select_rules(
+    tuple(enable) if enable is not None else None,
+    tuple(config.get('disable', [])) + tuple(disable)
+  )
+
+
+# Tags and attributes referred by Walk and rules (in Clark notation)
+ATTR_KEY = uixaml.clark('x:Key')
+ATTR_NAME = uixaml.clark('x:Name')
+TAG_ACTIVITYACTION = uixaml.clark('xaml:ActivityAction')
+TAG_CATCH = uixaml.clark('xaml:Catch')
+TAG_COMMENTOUT = uixaml.clark('ui:CommentOut')
+TAG_EXCELSCOPE = uixaml.clark('ui:ExcelApplicationScope')
+TAG_FLOWSTEP_NEXT = uixaml.clark('xaml:FlowStep.Next')
+TAG_IF = uixaml.clark('xaml:If')
+TAG_REFERENCE = uixaml.clark('x:Reference')
+TAG_SEQUENCE = uixaml.clark('xaml:Sequence')
+TAG_SEQUENCE_VARIABLES = uixaml.clark('xaml:Sequence.Variables')
+TAG_SENDHOTKEY = uixaml.clark('ui:SendHotkey')
+TAG_SENDHOTKEY_TARGET = uixaml.clark('ui:SendHotkey.Target')
+TAG_TRYCATCH_CATCHES = uixaml.clark('xaml:TryCatch.Catches')
+TAG_VIEWSTATE = uixaml.clark('sap2010:WorkflowViewStateService.ViewState')
+
+# Path to arguments of ui:InvokeWorkflowFile (in Dictionary of InvokeWorkflowFile.Arguments)
+PATH_ARGUMENTS = '%s/*/*' % uixaml.clark('ui:InvokeWorkflowFile.Arguments')
+TAGS_WNDSCOPE = frozenset(map(uixaml.clark, uixaml.wndscopes))
+TAGS_STATEFUL = TAGS_WNDSCOPE | {TAG_COMMENTOUT, TAG_EXCELSCOPE, TAG_IF}
+
+# XPath expressions referred by rules (compiled once per process)
+XPATH_SCREENSHOTS = etree.XPath('//ui:*[@InformativeScreenshot]', namespaces=uixaml.xamlns)
+XPATH_FLOWSTEP_ACTIVITY = etree.XPath(
+  './*[not(xaml:FlowStep.Next) and not(sap2010:*)]',
+  namespaces=uixaml.xamlns
+)
+
+# Regular expressions referred by rules (compiled once per process)
+RE_QUOTED = re.compile(r'".*?"')  # Texts surrounded by ""
+
+
+# Scanner of attribute values for string rules
+# Rules declare patterns for attributes by add(), and scan() tells names of the patterns found in
+# a value. A pattern is tried only if one of its literals is in the lower-cased value (a cheap
+# prefilter). Patterns of the attribute with the same normalization and case sensitivity are
+# searched at once by a precompiled alternation before telling which patterns are found, so
+# values without any findings (i.e. most of them) cost a few searches however many patterns there
+# are. A value is normalized at most once for all patterns with the same normalization.
+class AttributeScanner:
+  def __init__(self) -> None:
+    # Patterns for each attribute: {attribute: [(name, literals, compiled pattern, normalize)]}
+    self.patterns = {}
+
+    # Alternations of patterns for each attribute (compiled when it is scanned first)
+    # {attribute: [(normalize, compiled alternation, patterns in it)]}
+    self.combined = {}
+
+  # Add a pattern for the attribute
+  # literals: Lower-cased strings one of which is always in the lower-cased value if the pattern
+  # is found (empty means the pattern is always tried)
+  # ignorecase: The pattern is matched case-insensitively or not
+  # normalize: Function to normalize the value before matching the pattern (None means as is)
+  def add(
+    self, attribute: str, name: str, pattern: str, literals: tuple = (), ignorecase: bool = False,
+    normalize=None
+  ) -> None:
+    compiled = re.compile(pattern, re.IGNORECASE if ignorecase else 0)
+    self.patterns.setdefault(attribute, []).append((name, tuple(literals), compiled, normalize))
+    self.combined.pop(attribute, None)
+
+  # Get names of the patterns found in the value of the attribute (as a frozenset)
+  # Rules should check names of their own patterns since plugins may add other patterns.
+  def scan(self, attribute: str, value: str) -> frozenset:
+    lowered = value.lower()
+    candidates = set(filter(
+      lambda p: not p[1] or any(map(lambda literal: literal in lowered, p[1])),
+      self.patterns.get(attribute, ())
+    ))
+
+    if not candidates:
+      return NOTHING_FOUND
+
+    combined = self.combined.get(attribute)
+    if combined is None:
+      combined = self.compile(attribute)
+
+    found = []
+    normalized = {}  # {normalize: normalized value}
+
+    for normalize, alternation, patterns in combined:
+      patterns = list(filter(lambda p: p in candidates, patterns))
+      if not patterns:
+        continue
+
+      if normalize not in normalized:
+        normalized[normalize] = value if normalize is None else normalize(value)
+
+      target = normalized[normalize]
+      if alternation.search(target) is not None:
+        found.extend(name for name, literals, pattern, n in patterns if pattern.search(target))
+
+    return frozenset(found) if found else NOTHING_FOUND
+
+  # Compile alternations of patterns of the attribute (see scan)
+  def compile(self, attribute: str) -> list:
+    groups = OrderedDict()
+    for p in self.patterns[attribute]:
+      groups.setdefault((p[3], p[2].flags & re.IGNORECASE), []).append(p)
+
+    combined = []
+    for (normalize, flags), patterns in groups.items():
+      alternation = '|'.join(map(lambda p: '(?:%s)' % p[2].pattern, patterns))
+      combined.append((normalize, re.compile(alternation, flags), patterns))
+
+    self.combined[attribute] = combined
+    return combined
+
+
+NOTHING_FOUND = frozenset()
+
+
+# Remove texts surrounded by "" in the condition (see no_and_or)
+def strip_quoted(condition: str) -> str:
+  return RE_QUOTED.sub('', condition)  # XXX: Quotes are not escaped in VB ("")
+
+
+# Normalize the selector (attributes in "omit" namespace are removed)
+def normalize_selector(selector: str) -> str:
+  if selector[:1] == '<':
+    # Selector is written in pure selector expression
+    # (if it starts with '[', it is written in VB expression)
+    selxml = etree.fromstring('<selector xmlns:omit="omit">%s</selector>' % selector)
+    etree.strip_attributes(selxml, '{omit}*')  # Delete attribute with "omit" namespaces
+    return etree.tostring(selxml, encoding='unicode')
+
+  return selector
+
+
+# Patterns of string rules (plugins can also add patterns to it)
+attribute_scanner = AttributeScanner()
+attribute_scanner.add(
+  'Condition', 'no-and-or', r' (?:and|or) ', ('and', 'or'), True, strip_quoted
+)
+attribute_scanner.add('Text', 'kana-typeinto', r'[\uff65-\uff9f]')  # Half-width kana
+attribute_scanner.add(
+  'Selector', 'selector-extensions', r'''title=('[^']+|"[^"]+)\.([0-9a-zA-Z]{3,4}\b|\*)''',
+  ('title',), False, normalize_selector
+)
+attribute_scanner.add(
+  'Selector', 'selector-windowsforms', r'''cls=['"]windowsforms10\.''', ('windowsforms10',), True,
+  normalize_selector
+)
+
+
+# Get verdicts of selector rules (names of patterns found in the normalized selector)
+def selector_verdict(selector: str) -> frozenset:
+  return attribute_scanner.scan('Selector', selector)
+
+
+# Bounded LRU cache of selector verdicts keyed by raw selector strings
+# The same selectors repeat in many files as activities are copy-pasted.
+# Worker processes start with entries of the main process and send back entries added by them
+# (with hit/miss counters) in LintedXAML.selectors. Entries are also kept in the lint cache.
+class SelectorCache:
+  def __init__(self, maxsize: int = 4096) -> None:
+    self.maxsize = maxsize
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+    # Entries added since the last drain() (None unless it is in a worker process)
+    self.added = None
+
+  # Get verdicts of the selector (see selector_verdict)
+  def get(self, selector: str) -> tuple:
+    try:
+      verdict = self.entries[selector]
+    except KeyError:
+      self.misses += 1
+      verdict = selector_verdict(selector)
+      self.put(selector, verdict)
+
+      if self.added is not None:
+        self.added[selector] = verdict
+    else:
+      self.hits += 1
+      self.entries.move_to_end(selector)
+
+    return verdict
+
+  # Store verdicts of the selector (the least recently used one is evicted if it is full)
+  def put(self, selector: str, verdict: tuple) -> None:
+    self.entries[selector] = verdict
+    self.entries.move_to_end(selector)
+
+    if len(self.entries) > self.maxsize:
+      self.entries.popitem(last=False)
+
+  # Store verdicts of selectors in a dict
+  def update(self, entries: dict) -> None:
+    for selector, verdict in entries.items():
+      self.put(selector, verdict)
+
+  # Take entries added and counters since the last call as (entries, hits, misses)
+  def drain(self) -> tuple:
+    drained = (self.added, self.hits, self.misses)
+    self.added = {}
+    self.hits = 0
+    self.misses = 0
+
+    return drained
+
+  # Merge entries and counters taken by drain() in another process
+  def merge(self, drained: tuple) -> None:
+    entries, hits, misses = drained
+    self.update(entries)
+    self.hits += hits
+    self.misses += misses
+
+  # Remove all entries and reset counters
+  def clear(self) -> None:
+    self.entries.clear()
+    self.hits = 0
+    self.misses = 0
+
+
+# Selector verdicts shared by all XAML files in this process
+selector_cache = SelectorCache()
+
+
+# Walker of a XAML tree for XAML.lint
+# It visits each element only once and calls the rules registered for its tag.
+# Rules are called at the end of the element so that all of its children are available,
+# and the state of Walk represents ancestors of the element (the element itself is excluded).
+class Walk:
+  # Depth of descendants which rules refer to (e.g. rule:empty-catch refers to
+  # TryCatch.Catches/Catch/ActivityAction/* of TryCatch)
+  depth = 4
+
+  def __init__(self, xaml: LintedXAML, ruleset: RuleSet) -> None:
+    # Reference to the XAML file
+    self.xaml = xaml
+
+    # Rules to be evaluated
+    self.ruleset = ruleset
+
+    # Rule functions for each tag (see dispatch)
+    self.rules_by_tag = ruleset.rules_by_tag
+
+    # Number of elements walked through
+    self.nodes = 0
+
+    # Limits of time and memory checked while walking through (None means unlimited)
+    self.limits = None
+
+    # Results of each rule as a list of (document order, ResultXAML)
+    self.findings = [[] for r in ruleset.rules]
+
+    # Activities with a screenshot as a list of (document order, hash, DisplayName)
+    # They are taken at the end of each element, so they should be sorted (see ss_activities())
+    self.screenshots = []
+
+    # Invoked workflows in document order (see LintedXAML.invokes)
+    self.invokes = []
+
+    # Document order of the element whose rules are being called
+    self.position = 0
+
+    # State of ancestors
+    self.commentout = 0  # Number of ui:CommentOut
+    self.wndscopes = 0  # Number of Open/Attach Scopes
+    self.excelscopes = []  # Stack of ui:ExcelApplicationScope (the nearest one is the last)
+    self.ifs = 0  # Number of xaml:If
+    self.if_commentout = False  # The outermost xaml:If is in a ui:CommentOut or not
+
+  # Update the state when entering into the element
+  def enter(self, e) -> None:
+    tag = e.tag
+
+    if tag == TAG_COMMENTOUT:
+      self.commentout += 1
+    elif tag == TAG_EXCELSCOPE:
+      self.excelscopes.append(e)
+    elif tag == TAG_IF:
+      if self.ifs == 0:
+        self.if_commentout = self.commentout > 0
+      self.ifs += 1
+    else:
+      self.wndscopes += 1
+
+  # Update the state when leaving from the element
+  def leave(self, e) -> None:
+    tag = e.tag
+
+    if tag == TAG_COMMENTOUT:
+      self.commentout -= 1
+    elif tag == TAG_EXCELSCOPE:
+      self.excelscopes.pop()
+    elif tag == TAG_IF:
+      self.ifs -= 1
+    else:
+      self.wndscopes -= 1
+
+  # Get rule functions (with their index in ruleset.rules) for the tag
+  def dispatch(self, tag: str) -> list:
+    return self.ruleset.dispatch(tag)
+
+  # Walk through (event, element) pairs of "start" and "end" events
+  # If prune is True, subtrees deeper than Walk.depth are deleted after rules are evaluated.
+  # (It is used for streaming parse where a tree grows while walking through it.)
+  def run(self, events, prune: bool = False) -> None:
+    findings = self.findings
+    rules_by_tag = self.rules_by_tag
+    dispatch = self.dispatch
+    prunepath = '/'.join(['*'] * (self.depth - 1))  # Parents of the elements to be deleted
+    limits = self.limits
+    positions = []  # Document order of the elements being walked through
+    position = 0
+
+    for event, e in events:
+      tag = e.tag
+
+      if event == 'start':
+        positions.append(position)
+        position += 1
+
+        if limits is not None and position & 0x3ff == 0:
+          limits.check()
+
+        if tag in TAGS_STATEFUL:
+          self.enter(e)
+      else:
+        if tag in TAGS_STATEFUL:
+          self.leave(e)
+
+        pos = self.position = positions.pop()
+        handlers = rules_by_tag.get(tag)
+        if handlers is None:
+          handlers = dispatch(tag)
+
+        for index, function in handlers:
+          found = function(self, e)
+
+          if found is not None:
+            for result in found:
+              findings[index].append((pos, result))
+
+        if prune:
+          for d in list(e.iterfind(prunepath)):
+            del d[:]
+
+    self.nodes = position
+
+  # Get activities with a screenshot as a list of (hash, DisplayName) in document order
+  def ss_activities(self) -> list:
+    return list(map(lambda ss: ss[1:], sorted(self.screenshots, key=lambda ss: ss[0])))
+
+  # Get a list of ResultXAML
+  # Results are grouped by rules and sorted in document order as same as XPath queries do.
+  def results(self) -> list:
+    results = []
+    for f in self.findings:
+      f.sort(key=lambda finding: finding[0])
+      results.extend(map(lambda finding: finding[1], f))
+
+    return results
+
+
+# Walk which measures time of each rule (see Stats)
+class ProfiledWalk(Walk):
+  def __init__(self, xaml: LintedXAML, ruleset: RuleSet) -> None:
+    super().__init__(xaml, ruleset)
+
+    # Rule functions wrapped to be measured for each tag
+    self.rules_by_tag = {}
+
+    # Time of each rule: {name of the rule: [wall time, CPU time, number of calls]}
+    self.timings = {}
+
+  # Get rule functions wrapped to be measured
+  def dispatch(self, tag: str) -> list:
+    handlers = [
+      (index, self.measure(self.ruleset.rules[index].name, function))
+      for index, function in self.ruleset.dispatch(tag)
+    ]
+    self.rules_by_tag[tag] = handlers
+
+    return handlers
+
+  # Wrap the rule function to measure its time (results are taken in it)
+  def measure(self, name: str, function):
+    timing = self.timings.setdefault(name, [0.0, 0.0, 0])
+
+    def measured(walk: Walk, e):
+      started = clock()
+      found = function(walk, e)
+      results = list(found) if found is not None else None
+      ended = clock()
+
+      timing[0] += ended[0] - started[0]
+      timing[1] += ended[1] - started[1]
+      timing[2] += 1
+
+      return results
+
+    return measured
+
+  # Get statistics of the XAML file (started and parsed are clock() before and after parsing)
+  # If the file is parsed while walking through it (parsed is None), parse time is estimated
+  # as the time other than rules.
+  def stats(self, started: tuple, parsed: tuple = None) -> dict:
+    ended = clock()
+    rules = sum(map(lambda t: t[0], self.timings.values()))
+
+    return {
+      'wall': ended[0] - started[0],
+      'cpu': ended[1] - started[1],
+      'parse': parsed[0] - started[0] if parsed is not None else ended[0] - started[0] - rules,
+      'nodes': self.nodes,
+      'rules': self.timings,
+    }
+
+
+# Get child elements (comments and processing instructions are excluded)
+def children(e) -> list:
+  return list(e.iterchildren(tag=etree.Element))
+
+
+# Collect screenshots (their existence is checked by XAML.check_screenshots())
+@rule('ui:*')
+def inuse_screenshots(walk: Walk, e):
+  sfile = e.get('InformativeScreenshot')
+
+  if sfile is not None:
+    walk.screenshots.append((walk.position, sfile, uixaml.displayname(e)))
+
+
+# Collect invoked workflows (the graph of them is checked by check_invokes)
+# Invocations in ui:CommentOut are ignored.
+@rule('ui:InvokeWorkflowFile', ids=INVOKE_RULES)
+def invoked_workflows(walk: Walk, e):
+  target = e.get('WorkflowFileName')
+
+  if target is not None and walk.commentout == 0:
+    arguments = tuple(filter(None, map(lambda a: a.get(ATTR_KEY), e.iterfind(PATH_ARGUMENTS))))
+    walk.invokes.append((target, uixaml.displayname(e), arguments))
+
+
+# GetPassword activity should not be used
+@rule('ui:GetPassword', ids=('no-getpassword',))
+def no_getpassword(walk: Walk, e):
+  yield Finding(
+    'no-getpassword',
+    MessageCategory.ERROR,
+    '%s (GetPassword: %s)',
+    (uixaml.displayname(e),)
+  )
+
+
+# MessageBox not in a comment
+@rule('ui:MessageBox', ids=('messagebox',))
+def messagebox(walk: Walk, e):
+  if walk.commentout == 0:
+    yield Finding(
+      'messagebox',
+      MessageCategory.ERROR,
+      '%s (MessageBox: %s, Message: %s)',
+      (uixaml.displayname(e), e.get('Text'))
+    )
+
+
+# TerminateWorkflow not in a comment
+@rule('xaml:TerminateWorkflow', ids=('terminateworkflow',))
+def terminateworkflow(walk: Walk, e):
+  if walk.commentout == 0:
+    yield Finding(
+      'terminateworkflow',
+      MessageCategory.ERROR,
+      '%s (TerminateWorkflow: %s, Exception: %s, Reason: %s)',
+      (uixaml.displayname(e), e.get('Exception'), e.get('Reason'))
+    )
+
+
+# Looped activity in a Flowchart
+@rule('xaml:FlowStep', ids=('looped-activity',))
+def looped_activity(walk: Walk, e):
+  name = e.get(ATTR_NAME)
+
+  if name is None:
+    return
+
+  refs = chain.from_iterable(map(
+    lambda n: n.iterchildren(TAG_REFERENCE),
+    e.iterchildren(TAG_FLOWSTEP_NEXT)
+  ))
+
+  for ref in refs:
+    # Text nodes of x:Reference (they may be split by comments)
+    texts = [ref.text] + list(map(lambda c: c.tail, ref))
+
+    if name in texts:
+      yield Finding(
+        'looped-activity',
+        MessageCategory.ERROR,
+        '%s (Activity: %s)',
+        (uixaml.displayname(XPATH_FLOWSTEP_ACTIVITY(e)[0]),)
+      )
+      return
+
+
+# Empty Sequence
+@rule('xaml:Sequence', ids=('empty-sequence',))
+def empty_sequence(walk: Walk, e):
+  elems = children(e)
+
+  if len(elems) == 0 or (len(elems) == 1 and elems[0].tag == TAG_SEQUENCE_VARIABLES):
+    yield Finding(
+      'empty-sequence',
+      MessageCategory.ERROR,
+      '%s (Sequence: %s)',
+      (uixaml.displayname(e),)
+    )
+
+
+# Nested Sequence
+@rule('xaml:Sequence', ids=('nested-sequence',))
+def nested_sequence(walk: Walk, e):
+  if walk.commentout > 0:
+    return
+
+  elems = children(e)
+  tags = set(map(lambda c: c.tag, elems))
+
+  if TAG_SEQUENCE in tags and (
+    len(elems) == 1 or (len(elems) == 2 and TAG_SEQUENCE_VARIABLES in tags)
+  ):
+    yield Finding(
+      'nested-sequence',
+      MessageCategory.ERROR,
+      '%s (Sequence: %s -> %s))',
+      (
+        uixaml.displayname(e),
+        uixaml.displayname(next(c for c in elems if c.tag == TAG_SEQUENCE))
+      )
+    )
+
+
+# Sequence contains many of activities
+@rule('xaml:Sequence', ids=('max-activities',))
+def max_activities(walk: Walk, e):
+  if walk.commentout > 0:
+    return
+
+  activities = [c for c in children(e) if c.tag not in (TAG_SEQUENCE_VARIABLES, TAG_SEQUENCE)]
+
+  if len(activities) > 15:
+    yield Finding(
+      'max-activities',
+      MessageCategory.WARNING,
+      '%s (Sequence: %s)',
+      (uixaml.displayname(e),)
+    )
+
+
+# TryCatch with empty catch
+@rule('xaml:TryCatch', ids=('empty-catch',))
+def empty_catch(walk: Walk, e):
+  catches = list(e.iterchildren(TAG_TRYCATCH_CATCHES))
+
+  if not catches or any(
+    sum(map(lambda a: len(children(a)), catch.iterchildren(TAG_ACTIVITYACTION))) < 2
+    for c in catches
+    for catch in c.iterchildren(TAG_CATCH)
+  ):
+    yield Finding(
+      'empty-catch',
+      MessageCategory.ERROR,
+      '%s (TryCatch: %s)',
+      (uixaml.displayname(e),)
+    )
+
+
+# Nested If more than 3 times
+@rule('xaml:If', ids=('nested-if',))
+def nested_if(walk: Walk, e):
+  if walk.ifs >= 2 and not walk.if_commentout:
+    yield Finding(
+      'nested-if',
+      MessageCategory.WARNING,
+      '%s (If: %s, Condition: %s)',
+      (uixaml.displayname(e), e.get('Condition'))
+    )
+
+
+# Excel Application Scope with Visible enabled
+@rule('ui:ExcelApplicationScope', ids=('no-visible-excel',))
+def no_visible_excel(walk: Walk, e):
+  if e.get('Visible') != 'False':
+    yield Finding(
+      'no-visible-excel',
+      MessageCategory.WARNING,
+      '%s (Excel Application Scope: %s, File: %s)',
+      (uixaml.displayname(e), e.get('WorkbookPath'))
+    )
+
+
+# Workbook activities in an Excel Application Scope
+@rule(*uixaml.wbactivities, ids=('workbook-in-excel',))
+def workbook_in_excel(walk: Walk, e):
+  if walk.excelscopes:
+    yield Finding(
+      'workbook-in-excel',
+      MessageCategory.ERROR,
+      '%s (Excel Application Scope: %s, Activity: %s))',
+      (uixaml.displayname(walk.excelscopes[-1]), uixaml.displayname(e))
+    )
+
+
+# Launch via OpenApplication/StartProcess instead of Application Scope/Browser Scope
+@rule('ui:OpenApplication', 'ui:StartProcess', ids=('run-excel', 'run-word', 'run-browser'))
+def run_application(walk: Walk, e):
+  filepath = e.get('FileName')
+
+  if filepath is None:
+    return
+
+  filepath = filepath.lower()
+
+  if 'excel.exe' in filepath and 'run-excel' in walk.ruleset:
+    yield Finding(
+      'run-excel',
+      MessageCategory.ERROR,
+      '%s (Activity: %s)',
+      (uixaml.displayname(e),)
+    )
+  if 'winword.exe' in filepath and 'run-word' in walk.ruleset:
+    yield Finding(
+      'run-word',
+      MessageCategory.ERROR,
+      '%s (Activity: %s)',
+      (uixaml.displayname(e),)
+    )
+  if 'run-browser' in walk.ruleset and any(
+    map(lambda exe: exe in filepath, ('iexplore.exe', 'firefox.exe', 'chrome.exe'))
+  ):
+    yield Finding(
+      'run-browser',
+      MessageCategory.ERROR,
+      '%s (Activity: %s)',
+      (uixaml.displayname(e),)
+    )
+
+
+# SendHotkey with SpecialKey = False
+@rule('ui:SendHotkey', ids=('false-specialkey',))
+def false_specialkey(walk: Walk, e):
+  key = e.get('Key')
+
+  if e.get('SpecialKey') == 'False' and key is not None and key != '{x:Null}':
+    key = key.strip()
+    if len(key) > 1 and key.lower() in uixaml.specialkey:
+      yield Finding(
+        'false-specialkey',
+        MessageCategory.ERROR,
+        '%s (SendHotkey: %s, Key: %s)',
+        (uixaml.displayname(e), key)
+      )
+
 
-    # Path to project directory
-    if not os.path.isdir(projectdir):
-      raise ValueError('Given project directory is not found or not a directory.')
+# SendHotkey with empty Key
+@rule('ui:SendHotkey', ids=('empty-specialkey',))
+def empty_specialkey(walk: Walk, e):
+  if e.get('Key', '{x:Null}') == '{x:Null}':
+    yield Finding(
+      'empty-specialkey',
+      MessageCategory.ERROR,
+      '%s (SendHotkey: %s)',
+      (uixaml.displayname(e),)
+    )
 
-    self.projectdir = projectdir
 
-    # Path to the directory of screenshots
-    self.ssdir = os.path.join(self.projectdir, '.screenshots')
+# SendHotkey for Alt-F4
+@rule('ui:SendHotkey', ids=('no-altf4',))
+def no_altf4(walk: Walk, e):
+  if e.get('KeyModifiers') == 'Alt' and e.get('Key') == 'f4' and e.get('SpecialKey') == 'True':
+    yield Finding(
+      'no-altf4',
+      MessageCategory.ERROR,
+      '%s (SendHotkey: %s)',
+      (uixaml.displayname(e),)
+    )
 
-    # Path to project.json
-    self.prjfile = os.path.join(self.projectdir, 'project.json')
 
-    # Get all XAML files including sub-directories
-    self.xamlfiles = glob(os.path.join(projectdir, '**', '*.xaml'), recursive=True)
+# SendHotkey with empty selector
+@rule('ui:Target', ids=('empty-selector-sendhotkey',))
+def empty_selector_sendhotkey(walk: Walk, e):
+  if walk.wndscopes > 0 or e.get('Selector', '{x:Null}') != '{x:Null}':
+    return
 
-    # List of XAML classes for each XAML file
-    self.xamls = []
+  parent = e.getparent()
+  if parent.tag != TAG_SENDHOTKEY_TARGET or parent.getparent().tag != TAG_SENDHOTKEY:
+    return
 
-    # Set of screenshots in the project (hash only, without extensions)
-    self.ss_inuse = set()  # Seen in all XAML files
-    self.ss_stored = set()  # Stored in the project's screenshot directory
+  yield Finding(
+    'empty-selector-sendhotkey',
+    MessageCategory.WARNING,
+    '%s (SendHotkey: %s)',
+    (uixaml.displayname(e),)
+  )
 
-  # Get all stored screenshot files (i.e. return self.ss_stored)
-  def stored_screenshots(self) -> set:
-    if not any(self.ss_stored):
-      if os.path.isdir(self.ssdir):
-        self.ss_stored = set(map(lambda f: os.path.splitext(f)[0], os.listdir(self.ssdir)))
 
-    return self.ss_stored
+# TypeInto activity which possibly inputs a half-width kana
+@rule('ui:TypeInto', ids=('kana-typeinto-vb', 'kana-typeinto'))
+def kana_typeinto(walk: Walk, e):
+  text = e.get('Text')
 
-  # Get all in-use screenshots (i.e. return self.ss_inuse)
-  def inuse_screenshots(self) -> set:
-    if not any(self.ss_inuse):
-      self.ss_inuse = reduce(
-        lambda s1, s2: s1 | s2,
-        list(map(lambda xaml: xaml.inuse_screenshots(), self.xamls)),
-        set()
+  if text is None or len(text) < 1 or e.get('SimulateType', 'False') != 'False':
+    return
+
+  if text[:1] == '[':
+    # Text is written in VB expression
+    if 'kana-typeinto-vb' in walk.ruleset:
+      yield Finding(
+        'kana-typeinto-vb',
+        MessageCategory.WARNING,
+        '%s (TypeInto: %s, Text: %s)',
+        (uixaml.displayname(e), text)
       )
+  elif 'kana-typeinto' in walk.ruleset and 'kana-typeinto' in attribute_scanner.scan('Text', text):
+    # Text contains Half-width Kana
+    yield Finding(
+      'kana-typeinto',
+      MessageCategory.ERROR,
+      '%s (TypeInto: %s, Text: %s)',
+      (uixaml.displayname(e), text)
+    )
 
-    return self.ss_inuse
 
-  # Convert screenshot hash to actual file path
-  def screenshot_path(self, hash: str) -> str:
-    return os.path.join(self.ssdir, '%s.png' % hash)
+# And/Or in conditional clause
+@rule('xaml:*', ids=('no-and-or',))
+def no_and_or(walk: Walk, e):
+  condition = e.get('Condition')
 
-  # Get lint results including results of XAML files
-  def results(self) -> list:
-    return reduce(
-      lambda l1, l2: l1 + l2,
-      list(map(lambda xaml: xaml.results(), self.xamls)),
-      self._results
+  if condition is None:
+    return
+
+  if 'no-and-or' in attribute_scanner.scan('Condition', condition):
+    yield Finding(
+      'no-and-or',
+      MessageCategory.ERROR,
+      '%s (Activity: %s, Condition: %s)',
+      (uixaml.displayname(e), condition.lower())
     )
 
-  # Linter
-  def lint(self) -> None:
-    # Check existence of project.json file
-    if not os.path.isfile(self.prjfile):
-      self._results.append(Result(self.prjfile, MessageCategory.ERROR, _('rule:no-project-file')))
 
-    # Check all XAML files
-    xamls = list(map(lambda xamlpath: XAML(self, xamlpath), self.xamlfiles))
+# Selector check
+@rule('ui:*', ids=('selector-extensions', 'selector-windowsforms'))
+def selector_check(walk: Walk, e):
+  selector = e.get('Selector')
 
-    for xaml in xamls:
-      xaml.lint()
+  if selector is None or selector == '{x:Null}' or len(selector) < 1:
+    return
 
-    self.xamls = xamls
+  verdict = selector_cache.get(selector)
 
+  # Tip: Other rules can be implemented by adding patterns for Selector to attribute_scanner.
+  # e.g. Forbid user id like string, test environment identifier, test user id, etc...
 
-# Linter class for each XAML files
-class XAML:
-  def __init__(self, project: Project, xamlpath: str):
-    # Reference to the project
-    self.project = project
+  # Selector incl. extensions
+  if 'selector-extensions' in verdict and 'selector-extensions' in walk.ruleset:
+    yield Finding(
+      'selector-extensions',
+      MessageCategory.ERROR,
+      '%s (Activity: %s, Selector: %s)',
+      (uixaml.displayname(e), selector)
+    )
 
-    # Errors/Warnings (can access directly if you want a list of ResultXAML)
-    self._results = []
+  # Selector incl. WindowsForms classes
+  if 'selector-windowsforms' in verdict and 'selector-windowsforms' in walk.ruleset:
+    yield Finding(
+      'selector-windowsforms',
+      MessageCategory.ERROR,
+      '%s (Activity: %s, Selector: %s)',
+      (uixaml.displayname(e), selector)
+    )
 
-    # Screenshots seen in XAML files (hash only, without extensions)
-    self.screenshots = set()
 
-    # Path to XAML file
-    if not os.path.isfile(xamlpath):
-      raise ValueError('Given XAML file path is not found or not a file.')
+# Writers of lint results in each output format (see writers)
+# Results are written to a buffered stream one by one as soon as they are found, so memory usage
+# does not grow with the number of results. close() finishes the output (the stream is closed by
+# the caller). structured means the output is for machines (other messages should not be mixed).
+class ResultWriter(abc.ABC):
+  structured = False
 
-    self.xamlpath = xamlpath
+  def __init__(self, stream) -> None:
+    self.stream = stream
 
-    # XPath Evaluator
-    xaml = etree.parse(self.xamlpath)
-    self.xpath = etree.XPathEvaluator(xaml, namespaces=uixaml.xamlns)
+  @abc.abstractmethod
+  def write(self, result: Result) -> None:
+    pass
 
-  # Get all in-use screenshots (i.e. return self.screenshots)
-  def inuse_screenshots(self) -> set:
-    if not any(self.screenshots):
-      ss = set()
-      ss_elem = self.xpath('//ui:*[@InformativeScreenshot]')
+  def close(self) -> None:
+    self.stream.flush()
 
-      for e in ss_elem:
-        ssfile = e.get('InformativeScreenshot')
-        ss.add(ssfile)
 
-      self.screenshots = ss
+# Plain text format ("file: [Error] message")
+class TextWriter(ResultWriter):
+  labels = {MessageCategory.ERROR: 'Error', MessageCategory.WARNING: 'Warning'}
 
-    return self.screenshots
+  def write(self, result: Result) -> None:
+    if result.category not in self.labels:
+      raise Exception('Result category is not implemented.')
 
-  # Get lint results by a list of Result (not a list of ResultXAML)
-  def results(self) -> list:
-    return list(map(lambda r: Result(self.xamlpath, r.category, r.message), self._results))
+    self.stream.write('%s: [%s] %s\n' % (result.file, self.labels[result.category], result.message))
 
-  def lint(self):
-    # Check existence of all screenshots
-    ss_elems = self.xpath('//ui:*[@InformativeScreenshot]')
-    ss_files = self.project.stored_screenshots()
 
-    for e in ss_elems:
-      sfile = e.get('InformativeScreenshot')
+# VSTS (Azure DevOps) logging commands
+# VSTS syntax: https://github.com/Microsoft/vsts-tasks/blob/master/docs/authoring/commands.md
+class VstsWriter(ResultWriter):
+  types = {MessageCategory.ERROR: 'error', MessageCategory.WARNING: 'warning'}
 
-      if sfile not in ss_files:
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s, Screenshot: %s)' % (
-            _('rule:no-screenshots'),
-            uixaml.displayname(e),
-            sfile
-          )
-        ))
+  def write(self, result: Result) -> None:
+    if result.category not in self.types:
+      raise Exception('Result category is not implemented.')
 
-    #  GetPassword activity should not be used
-    getpass = self.xpath('//ui:GetPassword')
+    self.stream.write('##vso[task.logissue type=%s;sourcepath=%s;]%s\n' % (
+      self.types[result.category], result.file, result.message
+    ))
 
-    for e in getpass:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (GetPassword: %s)' % (_('rule:no-getpassword'), uixaml.displayname(e))
-      ))
 
-    # MessageBox not in a comment
-    msgbox = self.xpath('//ui:MessageBox[not(ancestor::ui:CommentOut)]')
+# JSON Lines (a JSON object for each result)
+class JsonLinesWriter(ResultWriter):
+  structured = True
 
-    for e in msgbox:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (MessageBox: %s, Message: %s)' % (
-          _('rule:messagebox'),
-          uixaml.displayname(e),
-          e.get('Text')
-        )
-      ))
+  def write(self, result: Result) -> None:
+    self.stream.write(json.dumps(OrderedDict((
+      ('file', result.file.replace(os.sep, '/')),
+      ('category', result.category.name),
+      ('rule', result.rule),
+      ('message', result.message),
+    ))))
+    self.stream.write('\n')
 
-    # TerminateWorkflow not in a comment
-    terminate = self.xpath('//xaml:TerminateWorkflow[not(ancestor::ui:CommentOut)]')
 
-    for e in terminate:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (TerminateWorkflow: %s, Exception: %s, Reason: %s)' % (
-          _('rule:terminateworkflow'),
-          uixaml.displayname(e),
-          e.get('Exception'),
-          e.get('Reason')
-        )
+# SARIF 2.1.0 (https://docs.oasis-open.org/sarif/sarif/v2.1.0/sarif-v2.1.0.html)
+# Results are streamed into the "results" array and the tool with rules seen in results follows
+# them (the order of JSON properties does not matter).
+class SarifWriter(ResultWriter):
+  structured = True
+  levels = {MessageCategory.ERROR: 'error', MessageCategory.WARNING: 'warning'}
+
+  def __init__(self, stream) -> None:
+    super().__init__(stream)
+    self.rules = set()
+    self.stream.write(
+      '{"version": "2.1.0", "$schema": "https://json.schemastore.org/sarif-2.1.0.json", '
+      '"runs": [{"results": ['
+    )
+    self.separator = '\n'
+
+  def write(self, result: Result) -> None:
+    sarif = OrderedDict()
+    if result.rule is not None:
+      sarif['ruleId'] = result.rule
+      self.rules.add(result.rule)
+
+    sarif['level'] = self.levels[result.category]
+    sarif['message'] = {'text': result.message}
+    sarif['locations'] = [
+      {'physicalLocation': {'artifactLocation': {'uri': result.file.replace(os.sep, '/')}}}
+    ]
+
+    self.stream.write(self.separator)
+    self.stream.write(json.dumps(sarif))
+    self.separator = ',\n'
+
+  def close(self) -> None:
+    rules = [
+      {'id': id, 'shortDescription': {'text': _('rule:%s' % id)}} for id in sorted(self.rules)
+    ]
+    driver = OrderedDict((('name', 'uilint'), ('version', __version__), ('rules', rules)))
+
+    self.stream.write('\n], "tool": %s}]}\n' % json.dumps({'driver': driver}))
+    super().close()
+
+
+# Output formats (plugins can add writers before main() parses arguments)
+writers = OrderedDict((
+  ('text', TextWriter),
+  ('vsts', VstsWriter),
+  ('jsonl', JsonLinesWriter),
+  ('sarif', SarifWriter),
+))
+
+
+# Open the output file for writing results (compressed by the extension: .gz, .bz2 or .xz)
+# Compression modules are imported only when they are used.
+def open_output(path: str):
+  extension = os.path.splitext(path)[1].lower()
+
+  if extension == '.gz':
+    import gzip
+    return gzip.open(path, 'wt', encoding='utf-8')
+  elif extension == '.bz2':
+    import bz2
+    return bz2.open(path, 'wt', encoding='utf-8')
+  elif extension == '.xz':
+    import lzma
+    return lzma.open(path, 'wt', encoding='utf-8')
+
+  return open(path, 'w', encoding='utf-8', buffering=1024 * 1024)
+
+
+# Show a summary of results for each project and all projects
+# (summary is a list of (project directory, number of errors, number of warnings))
+def print_summary(summary: list) -> None:
+  for projectdir, errors, warnings in summary:
+    if errors is None:
+      print('%s: %s' % (projectdir, _('msg:no-xamls')))
+    else:
+      print('%s: %s (Error: %d, Warning: %d)' % (
+        projectdir,
+        _('msg:project-failed') if errors > 0 else _('msg:project-passed'),
+        errors,
+        warnings
       ))
 
-    # Looped activity in a Flowchart
-    flow = self.xpath('//xaml:FlowStep[@x:Name = ./xaml:FlowStep.Next/x:Reference/text()]')
+  print('%s: %d/%d (Error: %d, Warning: %d)' % (
+    _('msg:projects-failed'),
+    sum(1 for s in summary if s[1] != 0),
+    len(summary),
+    sum(s[1] or 0 for s in summary),
+    sum(s[2] or 0 for s in summary)
+  ))
 
-    for e in flow:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (Activity: %s)' % (
-          _('rule:looped-activity'),
-          uixaml.displayname(
-            e.xpath(
-              './*[not(xaml:FlowStep.Next) and not(sap2010:*)]',
-              namespaces=uixaml.xamlns
-            )[0]
-          )
-        )
-      ))
 
-    # Empty Sequence
-    seq = self.xpath('//xaml:Sequence[not(*) or (count(*) = 1 and ./xaml:Sequence.Variables)]')
+# Finalize the run (exit with status 1 if there is an error)
+def finish(iserror: bool, vsts: bool) -> None:
+  if iserror:
+    if vsts:
+      print('##vso[task.complete result=Failed;]')
+    else:
+      sys.exit(1)
+  else:
+    if vsts:
+      print('##vso[task.complete result=Succeeded;]')
 
-    for e in seq:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (Sequence: %s)' % (_('rule:empty-sequence'), uixaml.displayname(e))
-      ))
+  sys.stdout.flush()
 
-    # Nested Sequence
-    seq = self.xpath(r'''
-//xaml:Sequence[
-  not(ancestor::ui:CommentOut) and
-  (
-    (count(*) = 1 and ./xaml:Sequence) or
-    (count(*) = 2 and ./xaml:Sequence and ./xaml:Sequence.Variables)
-  )
-]''')
 
-    for e in seq:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (Sequence: %s -> %s))' % (
-          _('rule:nested-sequence'),
-          uixaml.displayname(e),
-          uixaml.displayname(e.xpath('./xaml:Sequence', namespaces=uixaml.xamlns)[0])
-        )
-      ))
+# Report duplicate, orphan (stored but not in use) and missing (in use but not stored)
+# screenshots of the project
+def report_screenshots(prj: Project) -> None:
+  index = prj.screenshot_index()
+  duplicates = index.duplicates()
+  orphans = sorted(prj.stored_screenshots() - prj.inuse_screenshots())
+  missing = sorted(prj.inuse_screenshots() - prj.stored_screenshots())
 
-    # Sequence contains many of activities
-    seq = self.xpath(r'''
-//xaml:Sequence[
-  not(ancestor::ui:CommentOut) and
-  count(*[not(self::xaml:Sequence.Variables) and not(self::xaml:Sequence)]) > 15
-]''')
+  print('%s: %s (Files: %d, Hashed: %d, Duplicates: %d, Orphans: %d, Missing: %d)' % (
+    _('msg:screenshot-index'),
+    prj.ssdir,
+    len(index.files),
+    index.hashed,
+    sum(len(names) - 1 for names in duplicates),
+    len(orphans),
+    len(missing)
+  ))
 
-    for e in seq:
-      self._results.append(ResultXAML(
-        MessageCategory.WARNING,
-        '%s (Sequence: %s)' % (_('rule:max-activities'), uixaml.displayname(e))
-      ))
+  for names in duplicates:
+    print('%s: %s' % (_('msg:duplicate-screenshots'), ', '.join(names)))
 
-    # TryCatch with empty catch
-    trycatch = self.xpath(r'''
-//xaml:TryCatch[
-  not(./xaml:TryCatch.Catches) or
-  ./xaml:TryCatch.Catches/xaml:Catch[count(./xaml:ActivityAction/*) < 2]
-]''')
+  for ss in orphans:
+    print('%s: %s' % (_('msg:orphan-screenshot'), prj.screenshot_path(ss)))
 
-    for e in trycatch:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (TryCatch: %s)' % (_('rule:empty-catch'), uixaml.displayname(e))
-      ))
+  for ss in missing:
+    print('%s: %s' % (_('msg:missing-screenshot'), prj.screenshot_path(ss)))
 
-    # Nested If more than 3 times
-    seq = self.xpath('//xaml:If[not(ancestor::ui:CommentOut)]//xaml:If//xaml:If')
 
-    for e in seq:
-      self._results.append(ResultXAML(
-        MessageCategory.WARNING,
-        '%s (If: %s, Condition: %s)' % (
-          _('rule:nested-if'),
-          uixaml.displayname(e),
-          e.get('Condition')
-        )
-      ))
+# Parse a shard in "I/N" format (I is 1-based) and return (0-based index, number of shards)
+def parse_shard(value: str) -> tuple:
+  try:
+    index, count = map(int, value.split('/'))
+  except ValueError:
+    raise argparse.ArgumentTypeError('Shard should be in I/N format (e.g. 1/4).')
 
-    # Excel Application Scope with Visible enabled
-    eas = self.xpath('//ui:ExcelApplicationScope[not(@Visible) or @Visible != "False"]')
+  if not 1 <= index <= count:
+    raise argparse.ArgumentTypeError('Shard should be 1/N to N/N.')
 
-    for e in eas:
-      self._results.append(ResultXAML(
-        MessageCategory.WARNING,
-        '%s (Excel Application Scope: %s, File: %s)' % (
-          _('rule:no-visible-excel'),
-          uixaml.displayname(e),
-          e.get('WorkbookPath')
-        )
-      ))
+  return index - 1, count
 
-    # Workbook activities in an Excel Application Scope
-    eas = self.xpath('|'.join(map(
-      lambda e: '//ui:ExcelApplicationScope//%s' % e, uixaml.wbactivities
-    )))
 
-    for e in eas:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (Excel Application Scope: %s, Activity: %s))' % (
-          _('rule:workbook-in-excel'),
-          uixaml.displayname(
-            e.xpath(
-              'ancestor::ui:ExcelApplicationScope[1]',
-              namespaces=uixaml.xamlns
-            )[0]
-          ),
-          uixaml.displayname(e)
-        )
-      ))
+# Backends to remove screenshot files (see remove_screenshots)
+# remove() removes a batch of files and returns the number of errors, and commit() finishes
+# the removal (e.g. checkin of a VCS) and returns the number of errors.
+# Batches are limited by the number and total length of paths to fit in a command line.
+class ScreenshotRemover:
+  batch_files = 100
+  batch_chars = 8000
 
-    # Launch via OpenApplication/StartProcess instead of Application Scope/Browser Scope
-    openapp = self.xpath('//ui:OpenApplication[@FileName]|//ui:StartProcess[@FileName]')
+  def __init__(self, project: Project) -> None:
+    self.project = project
 
-    for e in openapp:
-      filepath = e.get('FileName').lower()
+  # Split paths into batches
+  def batches(self, paths: list):
+    batch = []
+    chars = 0
+
+    for path in paths:
+      if batch and (len(batch) >= self.batch_files or chars + len(path) > self.batch_chars):
+        yield batch
+        batch = []
+        chars = 0
+
+      batch.append(path)
+      chars += len(path) + 1
+
+    if batch:
+      yield batch
+
+  def remove(self, paths: list) -> int:
+    return 0
+
+  def commit(self) -> int:
+    return 0
+
+  # Run a command and show its output only if it fails (returns True if it succeeds)
+  def run(self, args: list) -> bool:
+    return self.output(args) is not None
+
+  # Run a command and get its output (None is returned and the output is shown if it fails)
+  def output(self, args: list) -> str:
+    try:
+      proc = subprocess.run(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True
+      )
+    except OSError as e:
+      print('%s: %s' % (args[0], e), file=sys.stderr)
+      return None
 
-      if 'excel.exe' in filepath:
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s)' % (_('rule:run-excel'), uixaml.displayname(e))
-        ))
-      if 'winword.exe' in filepath:
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s)' % (_('rule:run-word'), uixaml.displayname(e))
-        ))
-      if 'iexplore.exe' in filepath or 'firefox.exe' in filepath or 'chrome.exe' in filepath:
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s)' % (_('rule:run-browser'), uixaml.displayname(e))
-        ))
+    if proc.returncode != 0:
+      print(proc.stdout.rstrip('\n'), file=sys.stderr)
+      return None
 
-    # SendHotkey with SpecialKey = False
-    sendkey = self.xpath('//ui:SendHotkey[@SpecialKey = "False" and @Key != "{x:Null}"]')
+    return proc.stdout
 
-    for e in sendkey:
-      key = e.get('Key').strip()
-      if len(key) > 1 and key.lower() in uixaml.specialkey:
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (SendHotkey: %s, Key: %s)' % (_('rule:false-specialkey'), uixaml.displayname(e), key)
-        ))
 
-    # SendHotkey with empty Key
-    sendkey = self.xpath('//ui:SendHotkey[not(@Key) or @Key = "{x:Null}"]')
+# Remove files from the file system in parallel threads
+class FileRemover(ScreenshotRemover):
+  batch_files = 1000
+  batch_chars = sys.maxsize
 
-    for e in sendkey:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (SendHotkey: %s)' % (_('rule:empty-specialkey'), uixaml.displayname(e))
-      ))
+  def remove(self, paths: list) -> int:
+    with thread_pool(self.project.jobs) as executor:
+      return sum(executor.map(self.remove_file, paths))
 
-    # SendHotkey for Alt-F4
-    sendkey = self.xpath(r'''
-//ui:SendHotkey[
-  @KeyModifiers="Alt" and @Key="f4" and @SpecialKey="True"
-]''')
+  @staticmethod
+  def remove_file(path: str) -> int:
+    try:
+      os.remove(path)
+    except OSError as e:
+      print(e, file=sys.stderr)
+      return 1
 
-    for e in sendkey:
-      self._results.append(ResultXAML(
-        MessageCategory.ERROR,
-        '%s (SendHotkey: %s)' % (_('rule:no-altf4'), uixaml.displayname(e))
-      ))
+    return 0
 
-    # SendHotkey with empty selector
-    sendkey = self.xpath(r'''
-//ui:SendHotkey[%s]/ui:SendHotkey.Target/ui:Target[not(@Selector) or @Selector = "{x:Null}"]
-''' % ' and '.join(map(lambda e: 'not(ancestor::%s)' % e, uixaml.wndscopes)))
 
-    for e in sendkey:
-      self._results.append(ResultXAML(
-        MessageCategory.WARNING,
-        '%s (SendHotkey: %s)' % (_('rule:empty-selector-sendhotkey'), uixaml.displayname(e))
-      ))
+# Remove files from the git index and the working tree (they are committed by the user)
+# Untracked files cannot be removed by git rm, so they are removed from the file system.
+class GitRemover(ScreenshotRemover):
+  def remove(self, paths: list) -> int:
+    git = ['git', '-C', self.project.projectdir]
+    paths = list(map(os.path.abspath, paths))
 
-    # TypeInto activity which possibly inputs a half-width kana
-    typeinto = self.xpath(r'''
-//ui:TypeInto[
-  @Text and (not(@SimulateType) or @SimulateType = "False")
-]''')
+    # Paths are listed relative to the project directory
+    listed = self.output(git + ['ls-files', '-z', '--'] + paths)
+    if listed is None:
+      return len(paths)
 
-    for e in typeinto:
-      text = e.get('Text')
+    tracked = set(map(
+      lambda p: os.path.abspath(os.path.join(self.project.projectdir, p)),
+      filter(None, listed.split('\0'))
+    ))
 
-      if len(text) < 1:
-        continue
+    errors = sum(map(FileRemover.remove_file, filter(lambda p: p not in tracked, paths)))
 
-      if text[:1] == '[':
-        # Text is written in VB expression
-        self._results.append(ResultXAML(
-          MessageCategory.WARNING,
-          '%s (TypeInto: %s, Text: %s)' % (_('rule:kana-typeinto-vb'), uixaml.displayname(e), text)
-        ))
-      elif re.search(r'[\uff65-\uff9f]', text):
-        # Text contains Half-width Kana
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (TypeInto: %s, Text: %s)' % (_('rule:kana-typeinto'), uixaml.displayname(e), text)
-        ))
+    tracked = list(filter(lambda p: p in tracked, paths))
+    if tracked and not self.run(git + ['rm', '-q', '--'] + tracked):
+      errors += len(tracked)
 
-    # And/Or in conditional clause
-    andor = self.xpath('//xaml:*[@Condition]')
+    return errors
 
-    for e in andor:
-      condition = e.get('Condition').lower()
-      normalized_condition = re.sub(r'".*?"', '', condition)  # XXX: Remove texts surrounded by ""
 
-      if ' and ' in normalized_condition or ' or ' in normalized_condition:
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s, Condition: %s)' % (
-            _('rule:no-and-or'),
-            uixaml.displayname(e),
-            condition
-          )
-        ))
+# Remove files from TFVC of Azure DevOps (VSTS) and check in them
+# The tf command can be replaced by UILINT_TF environment variable (e.g. a fake for testing).
+class VstsRemover(ScreenshotRemover):
+  def executable(self) -> str:
+    return os.environ.get('UILINT_TF', 'tf')
 
-    # Selector check
-    selectors = self.xpath('//ui:*[@Selector and @Selector != "{x:Null}"]')
+  def login(self) -> str:
+    return '-jwt:%s' % os.environ.get('SYSTEM_ACCESSTOKEN', '')
 
-    for e in selectors:
-      selector = e.get('Selector')
+  def remove(self, paths: list) -> int:
+    return 0 if self.run([self.executable(), 'delete', self.login()] + paths) else len(paths)
 
-      if len(selector) < 1:
-        continue
+  def commit(self) -> int:
+    args = [
+      self.executable(), 'checkin', self.login(), '-comment:Remove screenshot(s)', '-noprompt'
+    ]
+    return 0 if self.run(args) else 1
 
-      if selector[:1] == '<':
-        # Selector is written in pure selector expression
-        # (if it starts with '[', it is written in VB expression)
-        selxml = etree.fromstring('<selector xmlns:omit="omit">%s</selector>' % selector)
-        etree.strip_attributes(selxml, '{omit}*')  # Delete attribute with "omit" namespaces
-        normalized_selector = etree.tostring(selxml, encoding='unicode')
-      else:
-        normalized_selector = selector
 
-      # Tip: Other rules can be implemented here.
-      # e.g. Forbid user id like string, test environment identifier, test user id, etc...
+# Backends to remove screenshot files for --remove-screenshots modes (except dryrun)
+removers = {
+  'file': FileRemover,
+  'git': GitRemover,
+  'vsts': VstsRemover,
+}
 
-      # Selector incl. extensions
-      if re.search(r'''title=('[^']+|"[^"]+)\.([0-9a-zA-Z]{3,4}\b|\*)''', normalized_selector):
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s, Selector: %s)' % (
-            _('rule:selector-extensions'),
-            uixaml.displayname(e),
-            selector
-          )
-        ))
-      if re.search(r'''cls=['"]windowsforms10\.''', normalized_selector, re.IGNORECASE):
-        self._results.append(ResultXAML(
-          MessageCategory.ERROR,
-          '%s (Activity: %s, Selector: %s)' % (
-            _('rule:selector-windowsforms'),
-            uixaml.displayname(e),
-            selector
-          )
-        ))
 
+# Remove unused screenshots of the project (mode: dryrun, file, git or vsts)
+# Returns the number of errors.
+def remove_screenshots(prj: Project, mode: str) -> int:
+  ss_diff = sorted(prj.stored_screenshots() - prj.inuse_screenshots())
 
-if __name__ == '__main__':
+  if not any(ss_diff):
+    return 0
+
+  print(_('msg:remove-screenshots'))
+
+  paths = list(map(prj.screenshot_path, ss_diff))
+  for ss_path in paths:
+    print('%s: %s' % (_('msg:remove-screenshot'), ss_path))
+
+  if mode == 'dryrun':
+    return 0
+
+  remover = removers[mode](prj)
+  removed = 0
+  errors = 0
+
+  for batch in remover.batches(paths):
+    errors += remover.remove(batch)
+    removed += len(batch)
+
+    print('%s: %d/%d (Error: %d)' % (_('msg:removed-screenshots'), removed, len(paths), errors))
+    sys.stdout.flush()
+
+  # The count is shown again if the removal cannot be finished
+  failed = remover.commit()
+  if failed > 0:
+    errors += failed
+    print('%s: %d/%d (Error: %d)' % (_('msg:removed-screenshots'), removed, len(paths), errors))
+
+  return errors
+
+
+# Find the project directory of the XAML file (the nearest directory with project.json)
+# The directory of the file is returned if there is no project.json in its parent directories.
+def find_projectdir(xamlpath: str) -> str:
+  filedir = os.path.dirname(os.path.abspath(xamlpath))
+  projectdir = filedir
+
+  while not os.path.isfile(os.path.join(projectdir, 'project.json')):
+    parent = os.path.dirname(projectdir)
+    if parent == projectdir:
+      return os.path.relpath(filedir)
+
+    projectdir = parent
+
+  return os.path.relpath(projectdir)
+
+
+# Lint UiPath projects and XAML files as a library and yield results (Result)
+# paths: Project directories and XAML files (a XAML file is linted with its project found by
+# find_projectdir, but other XAML files in the project are only scanned and their results are
+# not yielded)
+# config, enable, disable: Configuration of rules (see project_ruleset)
+# Other arguments (including baseline) are the same as Project. Results are yielded as soon as
+# each XAML file is linted and their messages are translated (see load_translation) only when
+# they are referred.
+def lint_paths(
+  paths: list, config: dict = None, jobs: int = 1, cachedir: str = None,
+  lowmemory: bool = False, budget: Budget = None, enable: list = None, disable: list = (),
+  baseline: 'Baseline' = None
+):
+  targets = OrderedDict()  # {project directory: XAML files to be linted (None means all)}
+
+  for path in paths:
+    if os.path.isdir(path):
+      targets[os.path.normpath(path)] = None
+    elif not os.path.isfile(path):
+      raise ValueError('%s is not found.' % path)
+    else:
+      xamlfiles = targets.setdefault(find_projectdir(path), [])
+      if xamlfiles is not None:
+        xamlfiles.append(os.path.realpath(path))
+
+  # Errors of the configuration are raised here (not while iterating results)
+  # Plugins are loaded before the worker pool is created.
+  rulesets = list(map(lambda d: project_ruleset(d, config, enable, disable), targets))
+
+  def iterlint():
+    executor = worker_pool(jobs) if len(targets) > 1 and jobs > 1 else None
+
+    try:
+      for (projectdir, xamlfiles), ruleset in zip(targets.items(), rulesets):
+        # Other XAML files are scanned for the graph of workflow invocations (see Project.only)
+        prj = Project(
+          projectdir, jobs, cachedir, lowmemory, ruleset, xamlfiles, executor, None, budget,
+          baseline
+        )
+        yield from prj.iterlint()
+    finally:
+      if executor is not None:
+        executor.shutdown()
+
+  jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+  return iterlint()
+
+
+# Command line interface
+def main(argv: list = None) -> None:
   parser = argparse.ArgumentParser(
     description='UiLint - A static code analyzer for UiPath XAML files.'
   )
   parser.add_argument(
     'dir',
-    help='Specify a directory of UiPath project. (default: current directory)',
-    nargs='?',
-    default='.'
+    help='Specify directories of UiPath projects. (default: current directory)',
+    nargs='*',
+    default=['.']
+  )
+  parser.add_argument(
+    '-r', '--recursive',
+    help='Lint all projects (directories with project.json) under the directories.',
+    action='store_true'
   )
   parser.add_argument(
     '--lang',
@@ -481,31 +3314,266 @@ if __name__ == '__main__':
     # VSTS syntax: https://github.com/Microsoft/vsts-tasks/blob/master/docs/authoring/commands.md
     action='store_true'
   )
+  parser.add_argument(
+    '--format',
+    help='Output format of results. (default: text, or vsts with --vsts)',
+    choices=list(writers)
+  )
+  parser.add_argument(
+    '--output',
+    help='Write results to the file instead of stdout. '
+    'It is compressed if the name ends with .gz, .bz2 or .xz.',
+    metavar='FILE'
+  )
+  parser.add_argument(
+    '-j', '--jobs',
+    help='Number of processes to lint XAML files in parallel. (default: 1, 0: number of CPUs)',
+    type=int,
+    default=1
+  )
+  parser.add_argument(
+    '--cache',
+    help='Cache lint results to skip unchanged XAML files. (default directory: %s)'
+    % default_cachedir().replace('%', '%%'),
+    metavar='DIR',
+    nargs='?',
+    const=default_cachedir()
+  )
+  parser.add_argument(
+    '--low-memory',
+    help='Parse XAML files in a streaming manner to reduce memory usage.',
+    action='store_true'
+  )
+  parser.add_argument(
+    '--timeout',
+    help='Abort lint of a XAML file if it takes more than the seconds.',
+    metavar='SECONDS',
+    type=float
+  )
+  parser.add_argument(
+    '--max-memory',
+    help='Abort lint of a XAML file if it uses more memory than the size in MiB (Linux only).',
+    metavar='MIB',
+    type=int
+  )
+  parser.add_argument(
+    '--config',
+    help='Configuration file for rules. (default: uilint.json in the project directory)',
+    metavar='FILE'
+  )
+  parser.add_argument(
+    '--enable',
+    help='Enable only the specified rule. It can be specified multiple times.',
+    metavar='RULE',
+    action='append'
+  )
+  parser.add_argument(
+    '--disable',
+    help='Disable the specified rule. It can be specified multiple times.',
+    metavar='RULE',
+    action='append',
+    default=[]
+  )
+  parser.add_argument(
+    '--shard',
+    help='Lint only the I-th of N shards of XAML files (balanced by file size).',
+    metavar='I/N',
+    type=parse_shard
+  )
+  parser.add_argument(
+    '--partial',
+    help='Write results and in-use screenshots to the file in JSON to merge them later.',
+    metavar='FILE'
+  )
+  parser.add_argument(
+    '--merge',
+    help='Merge partial results files of all shards instead of linting projects.',
+    metavar='FILE',
+    nargs='+'
+  )
+  parser.add_argument(
+    '--baseline',
+    help='Report only findings which are not in the baseline file (see --update-baseline).',
+    metavar='FILE'
+  )
+  parser.add_argument(
+    '--update-baseline',
+    help='Write fingerprints of all findings to the baseline file instead of reporting them.',
+    action='store_true'
+  )
+  parser.add_argument(
+    '--files',
+    help='Lint given XAML files (and directories) in a single process, e.g. for pre-commit. '
+    '"-" reads paths from stdin line by line.',
+    action='store_true'
+  )
+  parser.add_argument(
+    '--changed-since',
+    help='Lint only XAML files changed since the git ref (e.g. origin/master).',
+    metavar='REF'
+  )
+  parser.add_argument(
+    '--watch',
+    help='Keep running and lint changed XAML files again when they are saved.',
+    action='store_true'
+  )
+  parser.add_argument(
+    '--stats',
+    help='Write performance statistics (time of phases, rules and files) to the file in JSON.',
+    metavar='FILE'
+  )
+  parser.add_argument(
+    '--profile',
+    help='Show the N slowest rules and XAML files to stderr. (default: 10)',
+    metavar='N',
+    type=int,
+    nargs='?',
+    const=10
+  )
+  parser.add_argument(
+    '--list-rules',
+    help='Show all rules and exit.',
+    action='store_true'
+  )
   parser.add_argument(
     '--nologo',
     help='Do NOT display a logo.',
     action='store_false',
     dest='logo'
   )
+  parser.add_argument(
+    '--screenshot-report',
+    help='Report duplicate, unused and missing screenshot files.',
+    action='store_true'
+  )
   parser.add_argument(
     '--remove-screenshots',
     help='Remove unused screenshots from Version control system. (default: none)',
-    choices=['dryrun', 'file', 'vsts']
+    choices=['dryrun', 'file', 'git', 'vsts']
   )
-  arg = parser.parse_args()
+  arg = parser.parse_args(argv)
 
-  _ = gettext.translation(
-    'messages',
-    localedir=os.path.join(os.path.dirname(__file__), 'locale'),
-    languages=[arg.lang, 'en']
-  ).gettext
+  if arg.shard is not None and arg.remove_screenshots is not None:
+    parser.error('--remove-screenshots cannot be used with --shard (use it with --merge).')
 
-  try:
-    if not os.path.isdir(arg.dir):
-      print(_('msg:directory-not-found'))
+  if arg.shard is not None and arg.screenshot_report:
+    parser.error('--screenshot-report cannot be used with --shard (use it with --merge).')
+
+  if arg.update_baseline:
+    if arg.baseline is None:
+      parser.error('--update-baseline requires --baseline.')
+
+    # The baseline is rewritten with all findings, so all XAML files should be linted
+    for option in ('files', 'changed_since', 'shard', 'merge', 'watch'):
+      if getattr(arg, option):
+        parser.error('--update-baseline cannot be used with --%s.' % option.replace('_', '-'))
+
+  if arg.format is None:
+    arg.format = 'vsts' if arg.vsts else 'text'
+
+  # The task result is also reported in VSTS format (see finish)
+  arg.vsts = arg.vsts or arg.format == 'vsts'
+
+  load_translation(arg.lang)
+
+  # Budget to lint each XAML file
+  budget = None
+  if arg.timeout is not None or arg.max_memory is not None:
+    budget = Budget(arg.timeout, arg.max_memory)
+
+  # Known findings not to be reported (an empty baseline is updated)
+  baseline = None
+  if arg.update_baseline:
+    baseline = Baseline(arg.baseline)
+  elif arg.baseline is not None:
+    try:
+      baseline = Baseline.load(arg.baseline)
+    except (OSError, ValueError) as e:
+      print('%s (%s)' % (_('msg:invalid-baseline'), e))
       sys.exit(1)
+
+  # Writer of results
+  # Other messages are shown to stderr if structured results are written to stdout.
+  stdout = sys.stdout
+  try:
+    output = open_output(arg.output) if arg.output is not None else stdout
+  except (OSError, ImportError) as e:
+    print('%s (%s)' % (_('msg:output-error'), e))
+    sys.exit(1)
+
+  writer = writers[arg.format](output)
+  if writer.structured and output is stdout:
+    sys.stdout = sys.stderr
+
+  try:
+    # Lint given files in a batch (without the logo, projects and options for projects)
+    if arg.files:
+      paths = arg.dir
+      if paths == ['-']:
+        paths = list(filter(None, map(lambda line: line.rstrip('\r\n'), sys.stdin)))
+
+      for path in paths:
+        if not os.path.exists(path):
+          print('%s (%s)' % (_('msg:directory-not-found'), path))
+          sys.exit(1)
+
+      try:
+        common = load_config(arg.config) if arg.config is not None else None
+        results = lint_paths(
+          paths, common, arg.jobs, arg.cache, arg.low_memory, budget, arg.enable, arg.disable,
+          baseline
+        )
+      except (OSError, ValueError, ImportError) as e:
+        print('%s (%s)' % (_('msg:invalid-rules'), e))
+        sys.exit(1)
+
+      errors = 0
+      for result in results:
+        if result.category == MessageCategory.ERROR:
+          errors += 1
+
+        writer.write(result)
+
+      finish(errors > 0, arg.vsts)
+      sys.exit(0)
+
+    for projectdir in arg.dir:
+      if not arg.list_rules and not os.path.isdir(projectdir):
+        if len(arg.dir) > 1:
+          print('%s (%s)' % (_('msg:directory-not-found'), projectdir))
+        else:
+          print(_('msg:directory-not-found'))
+        sys.exit(1)
+
+    arg.dir = list(map(os.path.normpath, arg.dir))
+
+    # Find projects under the directories
+    if arg.recursive:
+      projectdirs = list(chain.from_iterable(map(find_projects, arg.dir)))
+
+      if not any(projectdirs) and not arg.list_rules:
+        print(_('msg:no-projects'))
+        sys.exit(1)
     else:
-      arg.dir = os.path.normpath(arg.dir)
+      projectdirs = arg.dir
+
+    # Select rules for each project by the configuration file and options
+    # (projects with the same configuration share the same RuleSet)
+    try:
+      common = load_config(arg.config) if arg.config is not None else None
+      rulesets = list(map(
+        lambda projectdir: project_ruleset(projectdir, common, arg.enable, arg.disable),
+        projectdirs or arg.dir[:1]
+      ))
+    except (OSError, ValueError, ImportError) as e:
+      print('%s (%s)' % (_('msg:invalid-rules'), e))
+      sys.exit(1)
+
+    if arg.list_rules:
+      ruleset = rulesets[0]
+      for id in chain(project_rules, chain.from_iterable(map(lambda r: r.ids, rules))):
+        print('%s%s: %s' % (id, '' if id in ruleset else ' (disabled)', _('rule:%s' % id)))
+      sys.exit(0)
 
     if arg.logo:
       print(r'''
@@ -519,80 +3587,202 @@ if __name__ == '__main__':
               A static code analyzer for UiPath XAML files
 '''.lstrip('\r\n'))
 
-    # Initialize project linter
-    prj = Project(arg.dir)
+    # Merge partial results of shards and show them (instead of linting projects)
+    if arg.merge is not None:
+      try:
+        partials = []
+        for path in arg.merge:
+          with open(path, encoding='utf-8') as f:
+            partials.append(json.load(f))
+
+        merged = merge_partials(partials, baseline)
+      except (OSError, ValueError, KeyError, TypeError) as e:
+        print('%s (%s)' % (_('msg:invalid-partials'), e))
+        sys.exit(1)
 
-    # Check XAML files are exist
-    if not any(prj.xamlfiles):
-      print(_('msg:no-xamls'))
-      sys.exit(1)
+      summary = []
+
+      for projectdir, results, inuse in merged:
+        errors = 0
+        warnings = 0
+        for result in results:
+          if result.category == MessageCategory.ERROR:
+            errors += 1
+          elif result.category == MessageCategory.WARNING:
+            warnings += 1
+
+          writer.write(result)
+
+        summary.append((projectdir, errors, warnings))
+
+        # Unused screenshots are computed from in-use screenshots of all shards
+        if arg.screenshot_report or arg.remove_screenshots is not None:
+          prj = Project(projectdir, arg.jobs, arg.cache)
+          prj.ss_inuse = inuse
+
+          if arg.screenshot_report:
+            report_screenshots(prj)
+
+          if arg.remove_screenshots is not None:
+            remove_screenshots(prj, arg.remove_screenshots)
+
+      if len(summary) > 1:
+        print_summary(summary)
+
+      finish(any(map(lambda s: s[1] != 0, summary)), arg.vsts)
+      sys.exit(0)
+
+    # Worker processes are shared by all projects (plugins are already loaded)
+    jobs = arg.jobs if arg.jobs > 0 else (os.cpu_count() or 1)
+    executor = worker_pool(jobs) if len(projectdirs) > 1 and jobs > 1 else None
+
+    # Performance statistics of all projects
+    stats = Stats() if arg.stats is not None or arg.profile is not None else None
+
+    # Lint projects one by one
+    projects = []
+    summary = []  # (project directory, number of errors, number of warnings)
+
+    try:
+      for projectdir, ruleset in zip(projectdirs, rulesets):
+        # Get XAML files changed in the git repository
+        changed = None
+        if arg.changed_since is not None:
+          try:
+            changed = git_changed_files(projectdir, arg.changed_since)
+          except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, 'stderr', None)
+            message = stderr.decode('utf-8', 'replace').strip() if stderr else e
+            print('%s (%s)' % (_('msg:git-error'), message))
+            sys.exit(1)
+
+        # Initialize project linter
+        prj = Project(
+          projectdir, arg.jobs, arg.cache, arg.low_memory, ruleset, changed, executor, stats,
+          budget, None if arg.update_baseline else baseline
+        )
 
-    # Do lint
-    prj.lint()
+        # Check XAML files are exist
+        if not any(prj.xamlfiles):
+          if len(projectdirs) > 1:
+            summary.append((projectdir, None, None))  # Shown in the summary
+            continue
+
+          print(_('msg:no-xamls'))
+          sys.exit(1)
+
+        if arg.shard is not None:
+          prj.shard(*arg.shard)
+
+        # Add all findings to the baseline without formatting their messages
+        if arg.update_baseline:
+          prj.lint()
+          baseline.add(prj.findings())
+          continue
+
+        # Do lint and show results as soon as each XAML file is linted
+        errors = 0
+        warnings = 0
+        for result in prj.iterlint():
+          if result.category == MessageCategory.ERROR:
+            errors += 1
+          elif result.category == MessageCategory.WARNING:
+            warnings += 1
+
+          with prj.measure('output'):
+            writer.write(result)
+
+        projects.append(prj)
+        summary.append((projectdir, errors, warnings))
+
+        if arg.screenshot_report:
+          report_screenshots(prj)
+
+        # Remove unused screenshots
+        if arg.remove_screenshots is not None:
+          remove_screenshots(prj, arg.remove_screenshots)
+    finally:
+      if executor is not None:
+        executor.shutdown()
+
+    if arg.update_baseline:
+      try:
+        baseline.save()
+      except OSError as e:
+        print('%s (%s)' % (_('msg:invalid-baseline'), e))
+        sys.exit(1)
 
-    # Show results
-    iserror = False
-    for result in prj.results():
-      if result.category == MessageCategory.ERROR:
-        iserror = True
+      print('%s: %s (Findings: %d)' % (
+        _('msg:baseline-updated'), baseline.path, sum(baseline.fingerprints.values())
+      ))
+      finish(False, arg.vsts)
+      sys.exit(0)
 
-        if arg.vsts:
-          print('##vso[task.logissue type=error;sourcepath=%s;]%s'
-                % (result.file, result.message))
-        else:
-          print('%s: [Error] %s' % (result.file, result.message))
-      elif result.category == MessageCategory.WARNING:
-        if arg.vsts:
-          print('##vso[task.logissue type=warning;sourcepath=%s;]%s'
-                % (result.file, result.message))
-        else:
-          print('%s: [Warning] %s' % (result.file, result.message))
-      else:
-        raise Exception('Result category is not implemented.')
-
-    # Remove unused screenshots
-    if arg.remove_screenshots is not None:
-      ss_diff = prj.stored_screenshots() - prj.inuse_screenshots()
-
-      if any(ss_diff):
-        print(_('msg:remove-screenshots'))
-
-        for ss in ss_diff:
-          ss_path = prj.screenshot_path(ss)
-          print('%s: %s' % (_('msg:remove-screenshot'), ss_path))
-
-          if arg.remove_screenshots == 'file':
-            os.remove(ss_path)
-          elif arg.remove_screenshots == 'vsts':
-            subprocess.run(
-              'tf delete -jwt:"$SYSTEM_ACCESSTOKEN" "%s"' % ss_path,
-              shell=True,
-              stdout=subprocess.DEVNULL,
-              stderr=subprocess.DEVNULL
-            )
-
-        if arg.remove_screenshots == 'vsts':
-          subprocess.run(
-            'tf checkin -jwt:"$SYSTEM_ACCESSTOKEN" -comment:"Remove screeen shot(s)" -noprompt',
-            shell=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-          )
-
-    # Finalize
-    if iserror:
-      if arg.vsts:
-        print('##vso[task.complete result=Failed;]')
-      else:
-        sys.exit(1)
-    else:
-      if arg.vsts:
-        print('##vso[task.complete result=Succeeded;]')
+    # Show results for each project and all projects
+    iserror = any(map(lambda s: s[1] != 0, summary))
 
-    sys.stdout.flush()
+    if len(projectdirs) > 1:
+      print_summary(summary)
+
+    # Save results of the shard to merge them later
+    if arg.partial is not None:
+      with open(arg.partial, 'w', encoding='utf-8') as f:
+        json.dump({
+          'version': __version__,
+          'projects': list(map(lambda prj: prj.partial(), projects)),
+        }, f)
+
+    # Show performance statistics
+    if stats is not None:
+      if arg.stats is not None:
+        with open(arg.stats, 'w', encoding='utf-8') as f:
+          json.dump(stats.report(), f, indent=2)
+
+      if arg.profile is not None:
+        print(stats.table(arg.profile), file=sys.stderr)
+
+    # Show results of changed XAML files until it is interrupted
+    if arg.watch:
+      print(_('msg:watching'))
+      sys.stdout.flush()
+
+      try:
+        for i in watch(list(map(lambda prj: prj.projectdir, projects))):
+          for prj in projects:
+            graph = list(prj.graph_results())
+
+            for xaml in prj.update():
+              print('[%s] %s: %s' % (time.strftime('%H:%M:%S'), _('msg:linted'), xaml.xamlpath))
+
+              for result in prj.report(xaml.findings()):
+                writer.write(result)
+
+            # Results of the graph are shown again if they are changed
+            if list(prj.graph_results()) != graph:
+              print('[%s] %s: %s' % (time.strftime('%H:%M:%S'), _('msg:linted'), prj.projectdir))
+
+              for result in prj.graph_results():
+                writer.write(result)
+
+          sys.stdout.flush()
+          output.flush()
+      except KeyboardInterrupt:
+        sys.exit(0)
+
+    finish(iserror, arg.vsts)
 
   except BrokenPipeError:
     # https://docs.python.org/ja/3/library/signal.html#note-on-sigpipe
     devnull = os.open(os.devnull, os.O_WRONLY)
-    os.dup2(devnull, sys.stdout.fileno())
+    os.dup2(devnull, stdout.fileno())
     sys.exit(1)
+  finally:
+    sys.stdout = stdout
+    writer.close()
+
+    if output is not stdout:
+      output.close()
+
+
+if __name__ == '__main__':
+  main()
@@ -27,10 +27,16 @@ specialkey = {
 }
 
 
+# Get tag name in Clark notation from a prefixed name (e.g. ui:TypeInto -> {http://...}TypeInto)
+def clark(name: str) -> str:
+  prefix, localname = name.split(':', 1)
+  return '{%s}%s' % (xamlns[prefix], localname)
+
+
 # Get DisplayName of Activity
 def displayname(element) -> str:
   if tag(element) == 'Target':
-    element = element.xpath('../..')[0]
+    element = element.getparent().getparent()
 
   dispname = element.get('DisplayName')
   return dispname if dispname else tag(element)